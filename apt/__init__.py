@@ -1,4 +1,6 @@
+from functools import lru_cache
 from typing import Any, Dict, Optional
+from pydantic import TypeAdapter
 
 
 truthy_values = ["true", "yes", "y", "on"]
@@ -43,6 +45,11 @@ def try_float(element: Any) -> float | None:
         return None
 
 
+@lru_cache(maxsize=None)
+def get_type_adapter(cls: Any) -> TypeAdapter:
+    return TypeAdapter(cls)
+
+
 def to_camel_case(text: str) -> str:
     words = text.split("_")
     return words[0] + "".join(word.capitalize() for word in words[1:])
@@ -1,3 +1,7 @@
-from .json import JSON
+from .codec import Codec, register_codec
+from .json import JSON, JSONList, JSONStream
 from .query import Query
 from .path import Path
+from .header import Header, Cookie
+from .multipart import Multipart
+from apt.upload import UploadFile
@@ -0,0 +1,227 @@
+import re
+from codecs import getincrementaldecoder
+from json import JSONDecodeError, JSONDecoder
+from typing import Any, AsyncIterator
+from aiohttp import ClientPayloadError
+from aiohttp.hdrs import CONTENT_ENCODING
+from aiohttp.web import (
+    HTTPBadRequest,
+    HTTPRequestEntityTooLarge,
+    Request,
+    Response,
+)
+from result import Err, Ok, Result, is_err
+
+whitespace = re.compile(r"[ \t\n\r]*")
+structural = re.compile(r'["\[\]{}]')
+string_special = re.compile(r'["\\]')
+scalar_end = re.compile(r"[,\] \t\n\r]")
+json_decoder = JSONDecoder()
+compact_size = 64 * 1024
+
+
+def body_too_large(max_body_size: int, actual_size: int) -> Response:
+    return Response(
+        status=413,
+        text=f"Request body of {actual_size} bytes exceeds {max_body_size} bytes",
+    )
+
+
+def check_content_length(
+    request: Request, max_body_size: int | None
+) -> Result[int | None, Response]:
+    content_length = request.content_length
+    if (
+        max_body_size is not None
+        and content_length is not None
+        and content_length > max_body_size
+    ):
+        return Err(body_too_large(max_body_size, content_length))
+    return Ok(content_length)
+
+
+async def read_body(
+    request: Request, max_body_size: int | None = None
+) -> Result[bytes | bytearray, Response]:
+    if max_body_size is None:
+        return Ok(await request.read())
+
+    content_length_result = check_content_length(request, max_body_size)
+    if is_err(content_length_result):
+        return content_length_result
+    content_length = content_length_result.ok()
+
+    encoding = request.headers.get(CONTENT_ENCODING, "identity").lower()
+    try:
+        if content_length is not None and encoding == "identity":
+            buffer = bytearray(content_length)
+            view = memoryview(buffer)
+            offset = 0
+            async for chunk in request.content.iter_any():
+                end = offset + len(chunk)
+                if end > content_length:
+                    return Err(
+                        Response(status=400, text="Request body exceeds Content-Length")
+                    )
+                view[offset:end] = chunk
+                offset = end
+            if offset != content_length:
+                return Err(
+                    Response(
+                        status=400,
+                        text=f"Request body truncated at {offset} bytes",
+                    )
+                )
+            return Ok(buffer)
+
+        buffer = bytearray()
+        async for chunk in request.content.iter_any():
+            buffer += chunk
+            if len(buffer) > max_body_size:
+                return Err(body_too_large(max_body_size, len(buffer)))
+        return Ok(buffer)
+    except (ConnectionError, ClientPayloadError) as err:
+        return Err(Response(status=400, text=f"Request body truncated: {err}"))
+
+
+class ValueScanner:
+    start: int
+    position: int
+    depth: int
+    in_string: bool
+
+    def __init__(self):
+        self.reset(-1)
+
+    def reset(self, start: int):
+        self.start = start
+        self.position = start
+        self.depth = 0
+        self.in_string = False
+
+    def shift(self, offset: int):
+        self.start -= offset
+        self.position -= offset
+
+    def scan(self, buffer: str) -> bool:
+        if buffer[self.start] not in '"[{':
+            match = scalar_end.search(buffer, max(self.position, self.start + 1))
+            if match is None:
+                self.position = len(buffer)
+                return False
+            return True
+        while True:
+            if self.in_string:
+                match = string_special.search(buffer, self.position)
+                if match is None:
+                    self.position = len(buffer)
+                    return False
+                elif match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        self.position = match.start()
+                        return False
+                    self.position = match.end() + 1
+                    continue
+                self.in_string = False
+                self.position = match.end()
+                if self.depth == 0:
+                    return True
+            else:
+                match = structural.search(buffer, self.position)
+                if match is None:
+                    self.position = len(buffer)
+                    return False
+                char = match.group()
+                self.position = match.end()
+                if char == '"':
+                    self.in_string = True
+                elif char in "[{":
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth <= 0:
+                        return True
+
+
+async def iter_json_array(
+    request: Request, max_body_size: int | None = None
+) -> AsyncIterator[Any]:
+    decoder = getincrementaldecoder("utf-8")()
+    buffer = ""
+    index = 0
+    size = 0
+    state = "start"
+    eof = False
+    scanner = ValueScanner()
+    chunks = request.content.iter_any()
+
+    while not eof:
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            chunk = b""
+            eof = True
+        except (ConnectionError, ClientPayloadError) as err:
+            raise HTTPBadRequest(text=f"Request body truncated: {err}")
+        size += len(chunk)
+        if max_body_size is not None and size > max_body_size:
+            raise HTTPRequestEntityTooLarge(max_size=max_body_size, actual_size=size)
+        try:
+            buffer += decoder.decode(chunk, final=eof)
+        except UnicodeDecodeError as err:
+            raise HTTPBadRequest(text=str(err))
+
+        while True:
+            index = whitespace.match(buffer, index).end()
+            if index >= len(buffer):
+                break
+            char = buffer[index]
+            if state == "start":
+                if char != "[":
+                    raise HTTPBadRequest(text="Expected a JSON array")
+                state = "first"
+                index += 1
+            elif state == "first" and char == "]":
+                state = "done"
+                index += 1
+            elif state == "first" or state == "value":
+                end = -1
+                if scanner.start != index:
+                    scanner.reset(index)
+                    try:
+                        value, end = json_decoder.raw_decode(buffer, index)
+                    except JSONDecodeError:
+                        pass
+                if end < 0 or (
+                    not eof
+                    and (end >= len(buffer) or not scalar_end.match(buffer, end))
+                ):
+                    if not scanner.scan(buffer) and not eof:
+                        break
+                    try:
+                        value, end = json_decoder.raw_decode(buffer, index)
+                    except JSONDecodeError as err:
+                        raise HTTPBadRequest(text=str(err))
+                scanner.reset(-1)
+                state = "separator"
+                index = end
+                yield value
+            elif state == "separator" and char == ",":
+                state = "value"
+                index += 1
+            elif state == "separator" and char == "]":
+                state = "done"
+                index += 1
+            elif state == "done":
+                raise HTTPBadRequest(text="Unexpected data after JSON array")
+            else:
+                raise HTTPBadRequest(text=f"Unexpected {char!r} in JSON array")
+
+        if index > compact_size:
+            buffer = buffer[index:]
+            if scanner.start >= 0:
+                scanner.shift(index)
+            index = 0
+
+    if state != "done":
+        raise HTTPBadRequest(text="Request body truncated inside JSON array")
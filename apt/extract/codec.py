@@ -0,0 +1,336 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from struct import Struct, error as StructError
+from typing import Any
+from urllib.parse import parse_qsl, urlencode
+from pydantic_core import from_json, to_json
+
+uint16 = Struct(">H")
+uint32 = Struct(">I")
+uint64 = Struct(">Q")
+int8 = Struct(">b")
+int16 = Struct(">h")
+int32 = Struct(">i")
+int64 = Struct(">q")
+float32 = Struct(">f")
+float64 = Struct(">d")
+max_depth = 256
+
+
+class Codec(ABC):
+    content_type: str
+    aliases: tuple[str, ...] = ()
+    encodes_responses: bool = True
+
+    @abstractmethod
+    def decode(self, body: bytes) -> Any: ...
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes: ...
+
+
+class JSONCodec(Codec):
+    content_type = "application/json"
+
+    def decode(self, body: bytes) -> Any:
+        return from_json(body)
+
+    def encode(self, value: Any) -> bytes:
+        return to_json(value)
+
+
+def pack(value: Any, buffer: bytearray):
+    if value is None:
+        buffer.append(0xC0)
+    elif value is True:
+        buffer.append(0xC3)
+    elif value is False:
+        buffer.append(0xC2)
+    elif isinstance(value, int):
+        if not -0x8000000000000000 <= value <= 0xFFFFFFFFFFFFFFFF:
+            raise ValueError(f"Integer out of MessagePack range: {value}")
+        elif 0 <= value < 0x80:
+            buffer.append(value)
+        elif -0x20 <= value < 0:
+            buffer.append(value & 0xFF)
+        elif 0 <= value <= 0xFF:
+            buffer += b"\xcc" + bytes((value,))
+        elif 0 <= value <= 0xFFFF:
+            buffer += b"\xcd" + uint16.pack(value)
+        elif 0 <= value <= 0xFFFFFFFF:
+            buffer += b"\xce" + uint32.pack(value)
+        elif 0 <= value:
+            buffer += b"\xcf" + uint64.pack(value)
+        elif -0x80 <= value:
+            buffer += b"\xd0" + int8.pack(value)
+        elif -0x8000 <= value:
+            buffer += b"\xd1" + int16.pack(value)
+        elif -0x80000000 <= value:
+            buffer += b"\xd2" + int32.pack(value)
+        else:
+            buffer += b"\xd3" + int64.pack(value)
+    elif isinstance(value, float):
+        buffer += b"\xcb" + float64.pack(value)
+    elif isinstance(value, str):
+        data = value.encode()
+        size = len(data)
+        if size < 0x20:
+            buffer.append(0xA0 | size)
+        elif size <= 0xFF:
+            buffer += b"\xd9" + bytes((size,))
+        elif size <= 0xFFFF:
+            buffer += b"\xda" + uint16.pack(size)
+        else:
+            buffer += b"\xdb" + uint32.pack(size)
+        buffer += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        size = len(value)
+        if size <= 0xFF:
+            buffer += b"\xc4" + bytes((size,))
+        elif size <= 0xFFFF:
+            buffer += b"\xc5" + uint16.pack(size)
+        else:
+            buffer += b"\xc6" + uint32.pack(size)
+        buffer += value
+    elif isinstance(value, (list, tuple)):
+        size = len(value)
+        if size < 0x10:
+            buffer.append(0x90 | size)
+        elif size <= 0xFFFF:
+            buffer += b"\xdc" + uint16.pack(size)
+        else:
+            buffer += b"\xdd" + uint32.pack(size)
+        for item in value:
+            pack(item, buffer)
+    elif isinstance(value, dict):
+        size = len(value)
+        if size < 0x10:
+            buffer.append(0x80 | size)
+        elif size <= 0xFFFF:
+            buffer += b"\xde" + uint16.pack(size)
+        else:
+            buffer += b"\xdf" + uint32.pack(size)
+        for key, item in value.items():
+            pack(key, buffer)
+            pack(item, buffer)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+class Unpacker:
+    data: bytes
+    offset: int
+    depth: int
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+        self.depth = 0
+
+    def take(self, size: int) -> bytes:
+        start = self.offset
+        end = start + size
+        if end > len(self.data):
+            raise ValueError("Truncated MessagePack data")
+        self.offset = end
+        return self.data[start:end]
+
+    def number(self, struct: Struct) -> Any:
+        value = struct.unpack_from(self.data, self.offset)[0]
+        self.offset += struct.size
+        return value
+
+    def enter(self):
+        self.depth += 1
+        if self.depth > max_depth:
+            raise ValueError("MessagePack nesting too deep")
+
+    def array(self, size: int) -> list[Any]:
+        self.enter()
+        value = [self.unpack() for _ in range(size)]
+        self.depth -= 1
+        return value
+
+    def map(self, size: int) -> dict[Any, Any]:
+        self.enter()
+        value = {}
+        for _ in range(size):
+            key = self.unpack()
+            if isinstance(key, (list, dict)):
+                raise ValueError("Unsupported MessagePack map key")
+            value[key] = self.unpack()
+        self.depth -= 1
+        return value
+
+    def unpack(self) -> Any:
+        if self.offset >= len(self.data):
+            raise ValueError("Truncated MessagePack data")
+        code = self.data[self.offset]
+        self.offset += 1
+        if code < 0x80:
+            return code
+        elif code >= 0xE0:
+            return code - 0x100
+        elif code & 0xE0 == 0xA0:
+            return self.take(code & 0x1F).decode()
+        elif code & 0xF0 == 0x90:
+            return self.array(code & 0x0F)
+        elif code & 0xF0 == 0x80:
+            return self.map(code & 0x0F)
+        try:
+            match code:
+                case 0xC0:
+                    return None
+                case 0xC2:
+                    return False
+                case 0xC3:
+                    return True
+                case 0xC4:
+                    return self.take(self.take(1)[0])
+                case 0xC5:
+                    return self.take(self.number(uint16))
+                case 0xC6:
+                    return self.take(self.number(uint32))
+                case 0xCA:
+                    return self.number(float32)
+                case 0xCB:
+                    return self.number(float64)
+                case 0xCC:
+                    return self.take(1)[0]
+                case 0xCD:
+                    return self.number(uint16)
+                case 0xCE:
+                    return self.number(uint32)
+                case 0xCF:
+                    return self.number(uint64)
+                case 0xD0:
+                    return self.number(int8)
+                case 0xD1:
+                    return self.number(int16)
+                case 0xD2:
+                    return self.number(int32)
+                case 0xD3:
+                    return self.number(int64)
+                case 0xD9:
+                    return self.take(self.take(1)[0]).decode()
+                case 0xDA:
+                    return self.take(self.number(uint16)).decode()
+                case 0xDB:
+                    return self.take(self.number(uint32)).decode()
+                case 0xDC:
+                    return self.array(self.number(uint16))
+                case 0xDD:
+                    return self.array(self.number(uint32))
+                case 0xDE:
+                    return self.map(self.number(uint16))
+                case 0xDF:
+                    return self.map(self.number(uint32))
+        except StructError as e:
+            raise ValueError("Truncated MessagePack data") from e
+        raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+
+
+class MessagePackCodec(Codec):
+    content_type = "application/msgpack"
+    aliases = ("application/x-msgpack", "application/vnd.msgpack")
+
+    def decode(self, body: bytes) -> Any:
+        unpacker = Unpacker(bytes(body))
+        value = unpacker.unpack()
+        if unpacker.offset != len(unpacker.data):
+            raise ValueError("Trailing data after MessagePack value")
+        return value
+
+    def encode(self, value: Any) -> bytes:
+        buffer = bytearray()
+        pack(value, buffer)
+        return bytes(buffer)
+
+
+class FormCodec(Codec):
+    content_type = "application/x-www-form-urlencoded"
+    encodes_responses = False
+
+    def decode(self, body: bytes) -> Any:
+        value: dict[str, Any] = {}
+        for key, item in parse_qsl(bytes(body).decode(), keep_blank_values=True):
+            existing = value.get(key)
+            if existing is None:
+                value[key] = item
+            elif isinstance(existing, list):
+                existing.append(item)
+            else:
+                value[key] = [existing, item]
+        return value
+
+    def encode(self, value: Any) -> bytes:
+        return urlencode(value, doseq=True).encode()
+
+
+codecs: dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> Codec:
+    for content_type in (codec.content_type, *codec.aliases):
+        codecs[content_type] = codec
+    negotiate_codec.cache_clear()
+    return codec
+
+
+def media_type(content_type: str) -> str:
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def get_codec(content_type: str | None) -> Codec | None:
+    if not content_type:
+        return None
+    return codecs.get(media_type(content_type))
+
+
+def is_json_codec(codec: Codec | None) -> bool:
+    return codec is None or isinstance(codec, JSONCodec)
+
+
+@lru_cache(maxsize=256)
+def negotiate_codec(accept: str) -> Codec | None:
+    best: Codec | None = None
+    best_quality = 0.0
+    for media_range in accept.split(","):
+        name, *params = media_range.split(";")
+        codec = codecs.get(name.strip().lower())
+        if codec is None or not codec.encodes_responses:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best = codec
+            best_quality = quality
+    return best
+
+
+def request_codecs() -> list[Codec]:
+    return list({id(codec): codec for codec in codecs.values()}.values())
+
+
+def response_codecs() -> list[Codec]:
+    return [codec for codec in request_codecs() if codec.encodes_responses]
+
+
+def add_codec_content(content: dict[str, Any], response: bool = False):
+    json_content = content.get(JSONCodec.content_type)
+    if json_content is None:
+        return
+    for codec in response_codecs() if response else request_codecs():
+        if codec.content_type not in content:
+            content[codec.content_type] = json_content
+
+
+register_codec(JSONCodec())
+register_codec(MessagePackCodec())
+register_codec(FormCodec())
@@ -1,20 +1,42 @@
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Type, TypeGuard, TypeVar, TypedDict, Unpack
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Generic,
+    NotRequired,
+    Type,
+    TypeGuard,
+    TypeVar,
+    TypedDict,
+    Unpack,
+)
 from aiohttp.web import Request
 from result import Result
 
 from apt.openapi import OpenAPI
 from apt.openapi.spec import OpenAPIRoute
 
-
 E = TypeVar("E")
 
+type Extractor = Callable[[Request], Coroutine[Any, Any, Result[Any, Any]]]
+
 
 class ExtractKWArgs(TypedDict):
     request: Request
     path_pattern: str
 
 
+class ExtractCompileKWArgs(TypedDict):
+    name: str
+    path_pattern: str
+    max_body_size: NotRequired[int | None]
+    max_part_size: NotRequired[int | None]
+    checksum: NotRequired[str | None]
+    max_items: NotRequired[int | None]
+    collect_errors: NotRequired[bool | None]
+
+
 class ExtractIntoOpenAPIKWArgs(TypedDict):
     name: str
     openapi_route: OpenAPIRoute
@@ -24,11 +46,25 @@ class ExtractIntoOpenAPIKWArgs(TypedDict):
 
 
 class Extract(ABC, Generic[E]):
+    reads_body: bool = False
+    is_cheap: bool = False
+    is_concurrent: bool = False
+    needs_close: bool = False
 
     @staticmethod
     def is_extractor(cls: Any) -> TypeGuard["Extract"]:
         return cls is not None and hasattr(cls, "extract") and callable(cls.extract)
 
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        path_pattern = kwargs["path_pattern"]
+        extract = cls.extract
+
+        async def extractor(request: Request) -> Result["Extract", E]:
+            return await extract(cls, request=request, path_pattern=path_pattern)
+
+        return extractor
+
     @staticmethod
     @abstractmethod
     async def extract(cls, **kwargs: Unpack[ExtractKWArgs]) -> Result["Extract", E]: ...
@@ -0,0 +1,207 @@
+from functools import lru_cache
+from types import NoneType, UnionType
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Literal,
+    Mapping,
+    NamedTuple,
+    TypeVar,
+    Union,
+    Unpack,
+    get_args,
+    get_origin,
+    Type,
+)
+from aiohttp.web import Request, Response
+from multidict import CIMultiDictProxy
+from pydantic import BaseModel, ValidationError
+from result import Err, Result, Ok
+
+from apt.extract.extract import (
+    Extract,
+    ExtractCompileKWArgs,
+    ExtractIntoOpenAPIKWArgs,
+    ExtractKWArgs,
+    Extractor,
+)
+from apt.extract.query import query_field
+from apt.openapi import OpenAPIRoute, OpenAPI, get_or_create_schema
+from apt import get_type_adapter
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class HeaderField(NamedTuple):
+    name: str
+    key: str
+    is_list: bool
+    required: bool
+    annotation: Any
+
+
+@lru_cache(maxsize=None)
+def header_fields(
+    model: Type[BaseModel], location: Literal["header", "cookie"]
+) -> tuple[HeaderField, ...]:
+    fields: list[HeaderField] = []
+    for key, field in model.model_fields.items():
+        name = field.alias or key
+        if field.alias is None and location == "header":
+            name = key.replace("_", "-")
+        fields.append(
+            HeaderField(
+                name,
+                field.alias or key,
+                query_field(key, field.annotation).is_list,
+                field.is_required(),
+                field.annotation,
+            )
+        )
+    return tuple(fields)
+
+
+@lru_cache(maxsize=None)
+def header_decoder(model: Type[T]) -> Callable[[CIMultiDictProxy[str]], T]:
+    fields = header_fields(model, "header")
+    validate_python = get_type_adapter(model).validate_python
+
+    def decode(headers: CIMultiDictProxy[str]) -> T:
+        args: dict[str, Any] = {}
+        for name, key, is_list, _required, _annotation in fields:
+            if is_list:
+                values = headers.getall(name, None)
+                if values is not None:
+                    args[key] = values
+            else:
+                value = headers.get(name)
+                if value is not None:
+                    args[key] = value
+        return validate_python(args, strict=False)
+
+    return decode
+
+
+@lru_cache(maxsize=None)
+def cookie_decoder(model: Type[T]) -> Callable[[Mapping[str, str]], T]:
+    fields = header_fields(model, "cookie")
+    validate_python = get_type_adapter(model).validate_python
+
+    def decode(cookies: Mapping[str, str]) -> T:
+        args: dict[str, Any] = {}
+        for name, key, _is_list, _required, _annotation in fields:
+            value = cookies.get(name)
+            if value is not None:
+                args[key] = value
+        return validate_python(args, strict=False)
+
+    return decode
+
+
+def parameter_type(annotation: Any) -> Any:
+    if get_origin(annotation) is Union or isinstance(annotation, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not NoneType]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def header_parameters_into_openapi(
+    model: Type[BaseModel],
+    location: Literal["header", "cookie"],
+    openapi_route: OpenAPIRoute,
+    openapi: OpenAPI,
+    types: dict[Type, str],
+):
+    if "parameters" not in openapi_route:
+        openapi_route["parameters"] = []
+    for name, _key, _is_list, required, annotation in header_fields(model, location):
+        parameter: Any = {
+            "in": location,
+            "name": name,
+            "schema": get_or_create_schema(parameter_type(annotation), openapi, types),
+        }
+        if required:
+            parameter["required"] = True
+        openapi_route["parameters"].append(parameter)
+
+
+class Header(Generic[T], Extract[Response]):
+    value: T
+    is_cheap = True
+
+    def __init__(self, value: T):
+        self.value = value
+
+    def get(self) -> T:
+        return self.value
+
+    @staticmethod
+    async def extract(
+        cls, **kwargs: Unpack[ExtractKWArgs]
+    ) -> Result["Header[T]", Response]:
+        extractor = Header.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        decode = header_decoder(get_args(cls)[0])
+
+        async def extractor(request: Request) -> Result["Header[T]", Response]:
+            try:
+                return Ok(Header(decode(request.headers)))
+            except ValidationError as err:
+                return Err(Response(status=400, text=err.json()))
+
+        return extractor
+
+    @staticmethod
+    def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
+        header_parameters_into_openapi(
+            get_args(cls)[0],
+            "header",
+            kwargs["openapi_route"],
+            kwargs["openapi"],
+            kwargs["types"],
+        )
+
+
+class Cookie(Generic[T], Extract[Response]):
+    value: T
+    is_cheap = True
+
+    def __init__(self, value: T):
+        self.value = value
+
+    def get(self) -> T:
+        return self.value
+
+    @staticmethod
+    async def extract(
+        cls, **kwargs: Unpack[ExtractKWArgs]
+    ) -> Result["Cookie[T]", Response]:
+        extractor = Cookie.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        decode = cookie_decoder(get_args(cls)[0])
+
+        async def extractor(request: Request) -> Result["Cookie[T]", Response]:
+            try:
+                return Ok(Cookie(decode(request.cookies)))
+            except ValidationError as err:
+                return Err(Response(status=400, text=err.json()))
+
+        return extractor
+
+    @staticmethod
+    def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
+        header_parameters_into_openapi(
+            get_args(cls)[0],
+            "cookie",
+            kwargs["openapi_route"],
+            kwargs["openapi"],
+            kwargs["types"],
+        )
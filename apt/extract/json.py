@@ -1,16 +1,30 @@
-from typing import Generic, TypeVar, Unpack, get_args
-from pydantic import BaseModel, ValidationError
-from aiohttp.web import Response
-from result import Err, Result, Ok
+from typing import Annotated, Any, AsyncIterator, Generic, TypeVar, Unpack, get_args
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from pydantic_core import ErrorDetails, from_json
+from aiohttp.hdrs import CONTENT_TYPE
+from aiohttp.web import HTTPBadRequest, Request, Response
+from result import Err, Result, Ok, is_err
 
-from apt.extract.extract import Extract, ExtractIntoOpenAPIKWArgs, ExtractKWArgs
-from apt.openapi import get_or_create_schema
+from apt import get_type_adapter
+from apt.extract.body import check_content_length, iter_json_array, read_body
+from apt.extract.codec import add_codec_content, get_codec, is_json_codec
+
+from apt.extract.extract import (
+    Extract,
+    ExtractCompileKWArgs,
+    ExtractIntoOpenAPIKWArgs,
+    ExtractKWArgs,
+    Extractor,
+)
+from apt.openapi import OpenAPISchemaArray, get_or_create_schema
 
 T = TypeVar("T", bound=BaseModel)
+I = TypeVar("I")
 
 
 class JSON(Generic[T], Extract[Response]):
     value: T
+    reads_body = True
 
     def __init__(self, value: T):
         self.value = value
@@ -22,13 +36,31 @@ class JSON(Generic[T], Extract[Response]):
     async def extract(
         cls, **kwargs: Unpack[ExtractKWArgs]
     ) -> Result["JSON[T]", Response]:
-        request = kwargs["request"]
-        try:
-            json_type = get_args(cls)[0]
-            value = json_type.model_validate_json(await request.read())
-            return Ok(JSON(value))
-        except ValidationError as err:
-            return Err(Response(status=400, text=err.json()))
+        extractor = JSON.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        json_type = get_args(cls)[0]
+        max_body_size = kwargs.get("max_body_size")
+
+        async def extractor(request: Request) -> Result["JSON[T]", Response]:
+            body = await read_body(request, max_body_size)
+            if is_err(body):
+                return body
+            codec = get_codec(request.headers.get(CONTENT_TYPE))
+            try:
+                if is_json_codec(codec):
+                    value = json_type.model_validate_json(body.ok())
+                else:
+                    value = json_type.model_validate(codec.decode(body.ok()))
+                return Ok(JSON(value))
+            except ValidationError as err:
+                return Err(Response(status=400, text=err.json()))
+            except ValueError as err:
+                return Err(Response(status=400, text=str(err)))
+
+        return extractor
 
     @staticmethod
     def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
@@ -44,3 +76,166 @@ class JSON(Generic[T], Extract[Response]):
             openapi_route["requestBody"]["content"]["application/json"] = {}
 
         openapi_route["requestBody"]["content"]["application/json"]["schema"] = schema
+        add_codec_content(openapi_route["requestBody"]["content"])
+
+
+class JSONStream(Generic[T], Extract[Response]):
+    value: AsyncIterator[T]
+    reads_body = True
+
+    def __init__(self, value: AsyncIterator[T]):
+        self.value = value
+
+    def get(self) -> AsyncIterator[T]:
+        return self.value
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self.value
+
+    @staticmethod
+    async def extract(
+        cls, **kwargs: Unpack[ExtractKWArgs]
+    ) -> Result["JSONStream[T]", Response]:
+        extractor = JSONStream.compile(
+            cls, name="", path_pattern=kwargs["path_pattern"]
+        )
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        validate_python = get_type_adapter(get_args(cls)[0]).validate_python
+        max_body_size = kwargs.get("max_body_size")
+
+        async def validate_items(items: AsyncIterator[Any]) -> AsyncIterator[T]:
+            async for item in items:
+                try:
+                    yield validate_python(item)
+                except ValidationError as err:
+                    raise HTTPBadRequest(
+                        text=err.json(), content_type="application/json"
+                    )
+
+        async def extractor(request: Request) -> Result["JSONStream[T]", Response]:
+            content_length = check_content_length(request, max_body_size)
+            if is_err(content_length):
+                return content_length
+            items = iter_json_array(request, max_body_size)
+            return Ok(JSONStream(validate_items(items)))
+
+        return extractor
+
+    @staticmethod
+    def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
+        openapi_route = kwargs["openapi_route"]
+        openapi = kwargs["openapi"]
+        types = kwargs["types"]
+
+        json_type = get_args(cls)[0]
+        schema = OpenAPISchemaArray(
+            type="array", items=get_or_create_schema(json_type, openapi, types)
+        )
+        if "requestBody" not in openapi_route:
+            openapi_route["requestBody"] = {"content": {}}
+        if "application/json" not in openapi_route["requestBody"]["content"]:
+            openapi_route["requestBody"]["content"]["application/json"] = {}
+
+        openapi_route["requestBody"]["content"]["application/json"]["schema"] = schema
+
+
+def too_many_items(max_items: int) -> Response:
+    return Response(status=413, text=f"Request body exceeds {max_items} items")
+
+
+def invalid_items(err: ValidationError) -> set[int] | None:
+    indexes: set[int] = set()
+    for error in err.errors(include_url=False):
+        loc = error["loc"]
+        if not loc or not isinstance(loc[0], int):
+            return None
+        indexes.add(loc[0])
+    return indexes
+
+
+class JSONList(Generic[I], Extract[Response]):
+    value: list[I]
+    errors: list[ErrorDetails]
+    reads_body = True
+
+    def __init__(self, value: list[I], errors: list[ErrorDetails] | None = None):
+        self.value = value
+        self.errors = errors if errors is not None else []
+
+    def get(self) -> list[I]:
+        return self.value
+
+    @staticmethod
+    async def extract(
+        cls, **kwargs: Unpack[ExtractKWArgs]
+    ) -> Result["JSONList[I]", Response]:
+        extractor = JSONList.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        item_type = get_args(cls)[0]
+        max_body_size = kwargs.get("max_body_size")
+        max_items = kwargs.get("max_items")
+        collect_errors = kwargs.get("collect_errors") or False
+        adapter = (
+            get_type_adapter(list[item_type])
+            if max_items is None
+            else TypeAdapter(Annotated[list[item_type], Field(max_length=max_items)])
+        )
+        validate_json = adapter.validate_json
+        validate_python = adapter.validate_python
+
+        def error_response(err: ValidationError) -> Response:
+            if max_items is not None and any(
+                error["type"] == "too_long" and not error["loc"]
+                for error in err.errors(include_url=False)
+            ):
+                return too_many_items(max_items)
+            return Response(status=400, text=err.json())
+
+        async def extractor(request: Request) -> Result["JSONList[I]", Response]:
+            body = await read_body(request, max_body_size)
+            if is_err(body):
+                return body
+            codec = get_codec(request.headers.get(CONTENT_TYPE))
+            try:
+                if is_json_codec(codec):
+                    return Ok(JSONList(validate_json(body.ok())))
+                return Ok(JSONList(validate_python(codec.decode(body.ok()))))
+            except ValidationError as err:
+                indexes = invalid_items(err) if collect_errors else None
+                if indexes is None:
+                    return Err(error_response(err))
+                errors = err.errors(include_url=False)
+            except ValueError as err:
+                return Err(Response(status=400, text=str(err)))
+            items = from_json(body.ok()) if codec is None else codec.decode(body.ok())
+            valid = [item for index, item in enumerate(items) if index not in indexes]
+            try:
+                return Ok(JSONList(validate_python(valid), errors))
+            except ValidationError as err:
+                return Err(error_response(err))
+
+        return extractor
+
+    @staticmethod
+    def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
+        openapi_route = kwargs["openapi_route"]
+        openapi = kwargs["openapi"]
+        types = kwargs["types"]
+
+        item_type = get_args(cls)[0]
+        schema = OpenAPISchemaArray(
+            type="array", items=get_or_create_schema(item_type, openapi, types)
+        )
+        if "requestBody" not in openapi_route:
+            openapi_route["requestBody"] = {"content": {}}
+        if "application/json" not in openapi_route["requestBody"]["content"]:
+            openapi_route["requestBody"]["content"]["application/json"] = {}
+
+        openapi_route["requestBody"]["content"]["application/json"]["schema"] = schema
+        add_codec_content(openapi_route["requestBody"]["content"])
@@ -1,3 +1,4 @@
+from hashlib import new as new_hash
 from typing import (
     Any,
     Dict,
@@ -9,60 +10,144 @@ from typing import (
     get_origin,
     get_type_hints,
 )
-from aiohttp import BodyPartReader
-from aiohttp.web import Response
-from aiohttp.hdrs import CONTENT_DISPOSITION
-from result import Err, Result, Ok
+from aiohttp import BodyPartReader, ClientPayloadError
+from aiohttp.web import Request, Response
+from aiohttp.hdrs import CONTENT_TYPE
+from result import Err, Result, Ok, is_err
 
-from apt import dict_from_form_data
-from apt.extract.extract import Extract, ExtractIntoOpenAPIKWArgs, ExtractKWArgs
+from apt.extract.body import body_too_large, check_content_length
+from apt.extract.extract import (
+    Extract,
+    ExtractCompileKWArgs,
+    ExtractIntoOpenAPIKWArgs,
+    ExtractKWArgs,
+    Extractor,
+)
 from apt.openapi import get_or_create_schema
 from apt.openapi.spec import OpenAPIBinaryFormat
-
+from apt.upload import UploadFile
 
 T = TypeVar("T")
 
+chunk_size = 64 * 1024
+
 
 class Multipart(Generic[T], Extract[Response]):
     value: T
+    uploads: list[UploadFile]
+    reads_body = True
+    needs_close = True
 
-    def __init__(self, value: T):
+    def __init__(self, value: T, uploads: list[UploadFile] | None = None):
         self.value = value
+        self.uploads = uploads if uploads is not None else []
 
     def get(self) -> T:
         return self.value
 
+    def close(self):
+        for upload in self.uploads:
+            upload.close()
+
     @staticmethod
     async def extract(
         cls, **kwargs: Unpack[ExtractKWArgs]
     ) -> Result["Multipart", Response]:
-        request = kwargs["request"]
-        try:
-            multipart_type = get_args(cls)[0]
-            multipart_type_types = {
-                key: item_cls
-                for key, item_cls in get_type_hints(multipart_type).items()
-            }
-            multipart_value = multipart_type()
-            reader = await request.multipart()
-            while True:
-                part = cast(BodyPartReader | None, await reader.next())
-                if part is None:
-                    break
-                content_disposition = dict_from_form_data(
-                    part.headers.get(CONTENT_DISPOSITION)
+        extractor = Multipart.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        multipart_type = get_args(cls)[0]
+        multipart_type_types = {
+            key: item_cls for key, item_cls in get_type_hints(multipart_type).items()
+        }
+        max_body_size = kwargs.get("max_body_size")
+        max_part_size = kwargs.get("max_part_size")
+        checksum = kwargs.get("checksum")
+        if checksum is not None:
+            try:
+                new_hash(checksum)
+            except ValueError as err:
+                raise ValueError(f"Unsupported checksum algorithm: {checksum}") from err
+
+        async def extractor(request: Request) -> Result["Multipart", Response]:
+            if not request.content_type.startswith("multipart/"):
+                return Err(
+                    Response(status=400, text="multipart/* content type expected")
                 )
-                name = content_disposition.get("name")
-                if name is None:
-                    continue
-                part_type = multipart_type_types.get(name)
-                if part_type is bytes:
-                    setattr(multipart_value, name, await part.read(decode=False))
-                elif part_type is str or part_type is OpenAPIBinaryFormat:
-                    setattr(multipart_value, name, await part.text())
-            return Ok(Multipart(multipart_value))
-        except BaseException as err:
-            return Err(Response(status=400, text=str(err)))
+            content_length = check_content_length(request, max_body_size)
+            if is_err(content_length):
+                return content_length
+            uploads: list[UploadFile] = []
+            multipart: Multipart | None = None
+            total_size = 0
+            try:
+                multipart_value = multipart_type()
+                reader = await request.multipart()
+                while True:
+                    part = cast(BodyPartReader | None, await reader.next())
+                    if part is None:
+                        break
+                    name = part.name
+                    if name is None:
+                        continue
+                    part_type = multipart_type_types.get(name)
+                    upload: UploadFile | None = None
+                    data: bytearray | None = None
+                    if part_type is UploadFile:
+                        upload = UploadFile(
+                            name,
+                            part.filename,
+                            part.headers.get(CONTENT_TYPE),
+                            checksum,
+                        )
+                        uploads.append(upload)
+                    elif (
+                        part_type is bytes
+                        or part_type is str
+                        or part_type is OpenAPIBinaryFormat
+                    ):
+                        data = bytearray()
+                    part_size = 0
+                    while True:
+                        chunk = await part.read_chunk(chunk_size)
+                        if not chunk:
+                            break
+                        part_size += len(chunk)
+                        total_size += len(chunk)
+                        if max_part_size is not None and part_size > max_part_size:
+                            return Err(body_too_large(max_part_size, part_size))
+                        if max_body_size is not None and total_size > max_body_size:
+                            return Err(body_too_large(max_body_size, total_size))
+                        if upload is not None:
+                            await upload.write_async(chunk)
+                        elif data is not None:
+                            data += chunk
+                    if upload is not None:
+                        upload.finish()
+                        setattr(multipart_value, name, upload)
+                    elif data is not None and part_type is bytes:
+                        setattr(multipart_value, name, bytes(data))
+                    elif data is not None:
+                        charset = part.get_charset(default="utf-8")
+                        setattr(multipart_value, name, data.decode(charset))
+                multipart = Multipart(multipart_value, uploads)
+                return Ok(multipart)
+            except (
+                AssertionError,
+                ValueError,
+                LookupError,
+                ClientPayloadError,
+                ConnectionError,
+            ) as err:
+                return Err(Response(status=400, text=str(err)))
+            finally:
+                if multipart is None:
+                    for upload in uploads:
+                        upload.close()
+
+        return extractor
 
     @staticmethod
     def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
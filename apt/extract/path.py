@@ -1,25 +1,94 @@
+from inspect import isclass
 from typing import (
+    Any,
+    Callable,
     Generic,
-    Iterable,
+    Mapping,
     TypeVar,
     Unpack,
     get_args,
     Type,
     get_origin,
+    get_type_hints,
 )
-from aiohttp.web import Response
+from aiohttp.web import Request, Response
+from pydantic import BaseModel, ValidationError
 from result import Err, Result, Ok
 
-from apt.extract.extract import Extract, ExtractIntoOpenAPIKWArgs, ExtractKWArgs
+from apt.extract.extract import (
+    Extract,
+    ExtractCompileKWArgs,
+    ExtractIntoOpenAPIKWArgs,
+    ExtractKWArgs,
+    Extractor,
+)
 
 from apt.openapi.schema import get_or_create_schema
-from apt import str_to_python_value
+from apt import get_type_adapter
 
 T = TypeVar("T")
 
+type PathConverter = Callable[[Mapping[str, str]], Any]
+
+
+def path_pattern_names(path_pattern: str) -> list[str]:
+    return [
+        part[1:-1].split(":", 1)[0]
+        for part in path_pattern.split("/")
+        if part.startswith("{") and part.endswith("}")
+    ]
+
+
+def is_named_tuple(cls: Any) -> bool:
+    return isclass(cls) and issubclass(cls, tuple) and hasattr(cls, "_fields")
+
+
+def is_model(cls: Any) -> bool:
+    return isclass(cls) and issubclass(cls, BaseModel)
+
+
+def path_parameters(
+    path_type: Type, path_pattern: str, name: str
+) -> list[tuple[str, str, Type]]:
+    names = path_pattern_names(path_pattern)
+    fields: list[tuple[str, Type]]
+    if get_origin(path_type) is tuple:
+        fields = [
+            (names[i] if i < len(names) else "", item_type)
+            for i, item_type in enumerate(get_args(path_type))
+        ]
+    elif is_named_tuple(path_type):
+        fields = list(get_type_hints(path_type).items())
+    elif is_model(path_type):
+        fields = [
+            (key, field.annotation) for key, field in path_type.model_fields.items()
+        ]
+    else:
+        placeholder = name if name in names else names[0] if names else name
+        fields = [(placeholder, path_type)]
+
+    if len(fields) > len(names):
+        raise ValueError(
+            f"Path pattern {path_pattern} has {len(names)} placeholders"
+            f" but {path_type} expects {len(fields)}"
+        )
+
+    parameters = []
+    for i, (field, field_type) in enumerate(fields):
+        placeholder = field if field in names else names[i]
+        parameters.append((field, placeholder, field_type))
+    return parameters
+
+
+def path_value_converter(cls: Type) -> Callable[[str], Any]:
+    if cls is str:
+        return str
+    return get_type_adapter(cls).validate_python
+
 
 class Path(Generic[T], Extract[Response]):
     value: T
+    is_cheap = True
 
     def __init__(self, value: T):
         self.value = value
@@ -31,14 +100,80 @@ class Path(Generic[T], Extract[Response]):
     async def extract(
         cls, **kwargs: Unpack[ExtractKWArgs]
     ) -> Result["Path[T]", Response]:
-        request = kwargs["request"]
-        path_pattern = kwargs["path_pattern"]
-        try:
-            path_type = get_args(cls)[0]
-            value = Path.tuple_from_path(request.path, path_pattern, path_type)
-            return Ok(Path(value))
-        except Exception as err:
-            return Err(Response(status=400, text=str(err)))
+        extractor = Path.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        path_type = get_args(cls)[0]
+        convert = Path.compile_converter(
+            path_type, kwargs["path_pattern"], kwargs["name"]
+        )
+
+        async def extractor(request: Request) -> Result["Path[T]", Response]:
+            try:
+                return Ok(Path(convert(request.match_info)))
+            except ValidationError as err:
+                return Err(Response(status=400, text=err.json()))
+            except KeyError as err:
+                return Err(Response(status=400, text=f"Missing path parameter {err}"))
+
+        return extractor
+
+    @staticmethod
+    def compile_converter(
+        path_type: Type[T], path_pattern: str, name: str = ""
+    ) -> PathConverter:
+        parameters = path_parameters(path_type, path_pattern, name)
+
+        if is_model(path_type):
+            model_fields = tuple(
+                (field, placeholder) for field, placeholder, _ in parameters
+            )
+            model_validate = path_type.model_validate
+
+            def convert_model(match_info: Mapping[str, str]) -> Any:
+                return model_validate(
+                    {
+                        field: match_info[placeholder]
+                        for field, placeholder in model_fields
+                    }
+                )
+
+            return convert_model
+
+        converters = tuple(
+            (placeholder, path_value_converter(field_type))
+            for _, placeholder, field_type in parameters
+        )
+
+        if get_origin(path_type) is tuple:
+
+            def convert_tuple(match_info: Mapping[str, str]) -> Any:
+                return tuple(
+                    convert(match_info[placeholder])
+                    for placeholder, convert in converters
+                )
+
+            return convert_tuple
+        elif is_named_tuple(path_type):
+
+            def convert_named_tuple(match_info: Mapping[str, str]) -> Any:
+                return path_type(
+                    *(
+                        convert(match_info[placeholder])
+                        for placeholder, convert in converters
+                    )
+                )
+
+            return convert_named_tuple
+
+        ((placeholder, convert),) = converters
+
+        def convert_value(match_info: Mapping[str, str]) -> Any:
+            return convert(match_info[placeholder])
+
+        return convert_value
 
     @staticmethod
     def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
@@ -46,28 +181,22 @@ class Path(Generic[T], Extract[Response]):
         openapi = kwargs["openapi"]
         types = kwargs["types"]
         path_pattern = kwargs["path_pattern"]
+        name = kwargs["name"]
 
         path_type = get_args(cls)[0]
-        path_types: Iterable[Type]
-        if get_origin(path_type) is tuple:
-            path_types = get_args(path_type)
-        else:
-            path_types = [path_type]
 
         if "parameters" not in openapi_route:
             openapi_route["parameters"] = []
 
-        names = [
-            name[1:-1]
-            for name in path_pattern.split("/")
-            if name.startswith("{") and name.endswith("}")
-        ]
-        for i, path_type in enumerate(path_types):
+        for _, placeholder, field_type in path_parameters(
+            path_type, path_pattern, name
+        ):
             openapi_route["parameters"].append(
                 {
                     "in": "path",
-                    "name": names[i],
-                    "schema": get_or_create_schema(path_type, openapi, types),
+                    "name": placeholder,
+                    "required": True,
+                    "schema": get_or_create_schema(field_type, openapi, types),
                 }
             )
 
@@ -79,22 +208,9 @@ class Path(Generic[T], Extract[Response]):
         if len(path_parts) != len(pattern_parts):
             raise ValueError("Path parts and pattern parts do not match")
 
-        path_types: Iterable[Type]
-        if get_origin(path_type) is tuple:
-            path_types = get_args(path_type)
-        else:
-            path_types = [path_type]
-
-        path_type_index = 0
-        results = []
-        for i, pattern_part in enumerate(pattern_parts):
-            if pattern_part.startswith("{") and pattern_part.endswith("}"):
-                # TODO: use path_type to parse value
-                # path_type = path_types[path_type_index]
-                # path_type_index += 1
-                results.append(str_to_python_value(path_parts[i]))
-
-        if len(results) == 1:
-            return results[0]
-
-        return tuple(results)
+        match_info = {
+            pattern_part[1:-1].split(":", 1)[0]: path_parts[i]
+            for i, pattern_part in enumerate(pattern_parts)
+            if pattern_part.startswith("{") and pattern_part.endswith("}")
+        }
+        return Path.compile_converter(path_type, path_pattern)(match_info)
@@ -1,18 +1,103 @@
-from typing import Generic, TypeVar, Unpack, get_args, Type
+from collections.abc import Sequence as AbstractSequence, Set as AbstractSet
+from functools import lru_cache
+from types import NoneType, UnionType
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Generic,
+    NamedTuple,
+    Sequence,
+    TypeVar,
+    Union,
+    Unpack,
+    get_args,
+    get_origin,
+    Type,
+)
 from pydantic import BaseModel, ValidationError
-from aiohttp.web import Response
+from aiohttp.web import Request, Response
 from multidict import MultiDictProxy
 from result import Err, Result, Ok
 
-from apt.extract.extract import Extract, ExtractIntoOpenAPIKWArgs, ExtractKWArgs
+from apt.extract.extract import (
+    Extract,
+    ExtractCompileKWArgs,
+    ExtractIntoOpenAPIKWArgs,
+    ExtractKWArgs,
+    Extractor,
+)
 from apt.openapi import get_or_create_schema
-from apt import str_to_python_value
+from apt import get_type_adapter
 
 T = TypeVar("T", bound=BaseModel)
 
+list_origins = (
+    list,
+    tuple,
+    set,
+    frozenset,
+    Sequence,
+    AbstractSequence,
+    AbstractSet,
+)
+
+
+class QueryField(NamedTuple):
+    key: str
+    is_list: bool
+    is_optional: bool
+
+
+def query_field(key: str, cls: Any) -> QueryField:
+    is_optional = False
+    while True:
+        origin = get_origin(cls)
+        if origin is Annotated:
+            cls = get_args(cls)[0]
+        elif origin is Union or isinstance(cls, UnionType):
+            args = [arg for arg in get_args(cls) if arg is not NoneType]
+            is_optional = is_optional or len(args) != len(get_args(cls))
+            if len(args) != 1:
+                break
+            cls = args[0]
+        else:
+            break
+    is_list = get_origin(cls) in list_origins or cls in list_origins
+    return QueryField(key, is_list, is_optional)
+
+
+@lru_cache(maxsize=None)
+def query_decoder(query_type: Type[T]) -> Callable[[MultiDictProxy[str]], T]:
+    fields = tuple(
+        query_field(field.alias or key, field.annotation)
+        for key, field in query_type.model_fields.items()
+    )
+    validate_python = get_type_adapter(query_type).validate_python
+
+    def decode(query: MultiDictProxy[str]) -> T:
+        args: dict[str, Any] = {}
+        for key, is_list, is_optional in fields:
+            if is_list:
+                values = query.getall(key, None)
+                if values is not None:
+                    args[key] = values
+            else:
+                value = query.get(key)
+                if value is None:
+                    continue
+                elif is_optional and not value:
+                    args[key] = None
+                else:
+                    args[key] = value
+        return validate_python(args, strict=False)
+
+    return decode
+
 
 class Query(Generic[T], Extract[Response]):
     value: T
+    is_cheap = True
 
     def __init__(self, value: T):
         self.value = value
@@ -24,13 +109,21 @@ class Query(Generic[T], Extract[Response]):
     async def extract(
         cls, **kwargs: Unpack[ExtractKWArgs]
     ) -> Result["Query[T]", Response]:
-        request = kwargs["request"]
-        try:
-            query_type = get_args(cls)[0]
-            value = Query.struct_from_query_string(request.url.query, query_type)
-            return Ok(Query(value))
-        except ValidationError as err:
-            return Err(Response(status=400, text=err.json()))
+        extractor = Query.compile(cls, name="", path_pattern=kwargs["path_pattern"])
+        return await extractor(kwargs["request"])
+
+    @staticmethod
+    def compile(cls, **kwargs: Unpack[ExtractCompileKWArgs]) -> Extractor:
+        decode = query_decoder(get_args(cls)[0])
+
+        async def extractor(request: Request) -> Result["Query[T]", Response]:
+            try:
+                value = decode(request.url.query)
+                return Ok(Query(value))
+            except ValidationError as err:
+                return Err(Response(status=400, text=err.json()))
+
+        return extractor
 
     @staticmethod
     def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]):
@@ -53,10 +146,4 @@ class Query(Generic[T], Extract[Response]):
 
     @staticmethod
     def struct_from_query_string(query: MultiDictProxy[str], query_type: Type[T]) -> T:
-        args = {}
-        for key, value in query.items():
-            if isinstance(value, str):
-                args[key] = str_to_python_value(value[0])
-            else:
-                args[key] = [str_to_python_value(element) for element in value]
-        return query_type.model_validate(args)
+        return query_decoder(query_type)(query)
@@ -30,5 +30,6 @@ from .spec import (
 )
 from .openapi import openapi
 from .schema import (
+    SchemaTypes,
     get_or_create_schema,
 )
@@ -0,0 +1,116 @@
+import json
+from gzip import compress
+from hashlib import sha256
+from typing import Any, Callable, Coroutine, Type
+from aiohttp.hdrs import ACCEPT_ENCODING, IF_NONE_MATCH
+from aiohttp.web import Request, Response
+
+from apt.openapi.spec import OpenAPI
+from apt.router.endpoint import endpoint
+from apt.router.router import Router
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for encoding in accept_encoding.split(","):
+        name, _, params = encoding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class OpenAPIDocument:
+    spec: OpenAPI
+    router: Router | None
+    types: dict[Type, str] | None
+    revision: int | None
+    body: bytes
+    gzip_body: bytes
+    etag: str
+
+    def __init__(
+        self,
+        spec: OpenAPI,
+        router: Router | None = None,
+        types: dict[Type, str] | None = None,
+    ):
+        self.spec = spec
+        self.router = router
+        self.types = types
+        self.revision = None
+        self.body = b""
+        self.gzip_body = b""
+        self.etag = ""
+
+    def update(self, spec: OpenAPI | None = None):
+        if spec is not None:
+            self.spec = spec
+        self.body = json.dumps(self.spec, separators=(",", ":")).encode()
+        self.gzip_body = compress(self.body, mtime=0)
+        self.etag = f'"{sha256(self.body).hexdigest()}"'
+
+    def refresh(self):
+        if self.router is None:
+            if self.revision is None:
+                self.revision = 0
+                self.update()
+            return
+        revision = self.router.get_revision()
+        if revision == self.revision:
+            return
+        self.router.into_openapi(self.spec, self.types)
+        self.revision = revision
+        self.update()
+
+    def respond(self, request: Request) -> Response:
+        self.refresh()
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": ACCEPT_ENCODING,
+        }
+        if_none_match = request.headers.get(IF_NONE_MATCH)
+        if if_none_match is not None and etag_matches(if_none_match, self.etag):
+            return Response(status=304, headers=headers)
+        if accepts_gzip(request.headers.get(ACCEPT_ENCODING, "")):
+            headers["Content-Encoding"] = "gzip"
+            return Response(
+                body=self.gzip_body, content_type="application/json", headers=headers
+            )
+        return Response(
+            body=self.body, content_type="application/json", headers=headers
+        )
+
+
+def openapi_endpoint(
+    spec: OpenAPI | OpenAPIDocument,
+    router: Router | None = None,
+    path: str = "/openapi.json",
+) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+    document = (
+        spec if isinstance(spec, OpenAPIDocument) else OpenAPIDocument(spec, router)
+    )
+
+    @endpoint(
+        path=path,
+        method="GET",
+        responses={200: {"content": {"application/json": {}}}, 304: None},
+    )
+    async def openapi_json(request: Request) -> Response:
+        return document.respond(request)
+
+    return openapi_json
@@ -1,5 +1,9 @@
+from collections import deque
+from enum import Enum
+from inspect import isclass
 from types import NoneType, UnionType
 from typing import (
+    Annotated,
     Literal,
     NotRequired,
     Type,
@@ -9,8 +13,10 @@ from typing import (
     get_origin,
     get_type_hints,
 )
+from uuid import UUID
 
 from aiohttp import BodyPartReader
+from pydantic import BaseModel
 
 from apt.openapi.spec import (
     OpenAPI,
@@ -20,83 +26,152 @@ from apt.openapi.spec import (
     OpenAPISchemaArray,
     OpenAPISchemaOneOf,
 )
+from apt.upload import UploadFile
 from typing import Any
 
+schema_ref_template = "#/components/schemas/{model}"
 
-def get_or_create_schema(
-    cls: Type, openapi: OpenAPI, types: dict[Type, str]
-) -> OpenAPISchema:
-    name = types.get(cls)
-    if name is not None:
-        return {"$ref": f"#/components/schemas/{name}"}
-    elif cls is int:
-        return {"type": "integer"}
-    elif cls is float:
-        return {"type": "number"}
-    elif cls is str:
-        return {"type": "string"}
-    elif cls is bool:
-        return {"type": "boolean"}
-    elif cls is bytes or cls is BodyPartReader or cls is OpenAPIBinaryFormat:
-        return {"type": "string", "format": "binary"}
-    elif cls is Any:
-        return {}
-    elif cls is NoneType:
-        return {"nullable": True}
-    cls_origin = get_origin(cls)
-    if cls_origin is list:
-        array_schema = OpenAPISchemaArray(type="array")
-        list_type = get_args(cls)[0]
-        if list_type is not Any:
-            array_schema["items"] = get_or_create_schema(list_type, openapi, types)
-        return array_schema
-    elif cls_origin is dict:
-        object_schema = OpenAPISchemaObject(
-            type="object",
-            additionalProperties=True,
-        )
-        value_type = get_args(cls)[1]
-        if value_type is not Any:
-            object_schema["additionalProperties"] = get_or_create_schema(
-                value_type, openapi, types
-            )
-        return object_schema
-    elif cls_origin is Union or isinstance(cls, UnionType):
-        return OpenAPISchemaOneOf(
-            oneOf=[get_or_create_schema(item, openapi, types) for item in get_args(cls)]
-        )
-    elif cls_origin is Literal:
-        enum = list(get_args(cls))
-        literal_type = type(enum[0]) if len(enum) > 0 else None
-        if literal_type is int:
-            return {"type": "integer", "enum": enum}
-        elif literal_type is float:
-            return {"type": "number", "enum": enum}
-        elif literal_type is bool:
+
+class SchemaTypes(dict[Type, str]):
+    names: dict[str, int]
+    pydantic: bool
+
+    def __init__(self, pydantic: bool = False):
+        super().__init__()
+        self.names = {}
+        self.pydantic = pydantic
+
+
+class SchemaBuilder:
+    openapi: OpenAPI
+    types: dict[Type, str]
+    schemas: dict[str, OpenAPISchema] | None
+    queue: deque[tuple[Type, str]]
+
+    def __init__(self, openapi: OpenAPI, types: dict[Type, str]):
+        self.openapi = openapi
+        self.types = types
+        self.schemas = None
+        self.queue = deque()
+
+    def get_schemas(self) -> dict[str, OpenAPISchema]:
+        if self.schemas is None:
+            if "components" not in self.openapi:
+                self.openapi["components"] = {}
+            if "schemas" not in self.openapi["components"]:
+                self.openapi["components"]["schemas"] = {}
+            self.schemas = self.openapi["components"]["schemas"]
+        return self.schemas
+
+    def unique_name(self, cls: Type, name: str) -> str:
+        schemas = self.get_schemas()
+        names = self.types.names if isinstance(self.types, SchemaTypes) else {}
+        count = names.get(name, 0)
+        new_name = name if count == 0 else f"{name}{count - 1}"
+        while new_name in schemas:
+            new_name = f"{name}{count}"
+            count += 1
+        names[name] = count + 1
+        self.types[cls] = new_name
+        return new_name
+
+    def build(self, cls: Type) -> OpenAPISchema:
+        schema = self.schema(cls)
+        while self.queue:
+            cls, name = self.queue.popleft()
+            self.get_schemas()[name] = self.component(cls)
+        return schema
+
+    def schema(self, cls: Type) -> OpenAPISchema:
+        name = self.types.get(cls)
+        if name is not None:
+            return {"$ref": f"#/components/schemas/{name}"}
+        elif cls is int:
+            return {"type": "integer"}
+        elif cls is float:
+            return {"type": "number"}
+        elif cls is str:
+            return {"type": "string"}
+        elif cls is bool:
             return {"type": "boolean"}
-        else:
-            return {"type": "string", "enum": enum}
-    elif isinstance(cls, TypeAliasType):
-        name = internal_create_unique_name(cls, cls.__name__, openapi, types)
-        openapi["components"]["schemas"][name] = get_or_create_schema(
-            cls.__value__, openapi, types
-        )
+        elif (
+            cls is bytes
+            or cls is BodyPartReader
+            or cls is OpenAPIBinaryFormat
+            or cls is UploadFile
+        ):
+            return {"type": "string", "format": "binary"}
+        elif cls is UUID:
+            return {"type": "string", "format": "uuid"}
+        elif cls is Any:
+            return {}
+        elif cls is NoneType:
+            return {"nullable": True}
+        elif isclass(cls) and issubclass(cls, Enum):
+            enum_values = [item.value for item in cls]
+            enum_schema = self.schema(type(enum_values[0]) if enum_values else str)
+            enum_schema["enum"] = enum_values
+            return enum_schema
+        cls_origin = get_origin(cls)
+        if cls_origin is Annotated:
+            return self.schema(get_args(cls)[0])
+        elif cls_origin is list:
+            array_schema = OpenAPISchemaArray(type="array")
+            list_type = get_args(cls)[0]
+            if list_type is not Any:
+                array_schema["items"] = self.schema(list_type)
+            return array_schema
+        elif cls_origin is dict:
+            object_schema = OpenAPISchemaObject(
+                type="object",
+                additionalProperties=True,
+            )
+            value_type = get_args(cls)[1]
+            if value_type is not Any:
+                object_schema["additionalProperties"] = self.schema(value_type)
+            return object_schema
+        elif cls_origin is Union or isinstance(cls, UnionType):
+            return OpenAPISchemaOneOf(
+                oneOf=[self.schema(item) for item in get_args(cls)]
+            )
+        elif cls_origin is Literal:
+            enum = list(get_args(cls))
+            literal_type = type(enum[0]) if len(enum) > 0 else None
+            if literal_type is int:
+                return {"type": "integer", "enum": enum}
+            elif literal_type is float:
+                return {"type": "number", "enum": enum}
+            elif literal_type is bool:
+                return {"type": "boolean"}
+            else:
+                return {"type": "string", "enum": enum}
+        elif (
+            getattr(self.types, "pydantic", False)
+            and isclass(cls)
+            and issubclass(cls, BaseModel)
+        ):
+            pydantic_schema = self.pydantic_schema(cls)
+            if pydantic_schema is not None:
+                return pydantic_schema
+        name = self.unique_name(cls, cls.__name__)
+        self.get_schemas()[name] = {}
+        self.queue.append((cls, name))
         return {"$ref": f"#/components/schemas/{name}"}
-    else:
-        name = internal_create_unique_name(cls, cls.__name__, openapi, types)
+
+    def component(self, cls: Type) -> OpenAPISchema:
+        if isinstance(cls, TypeAliasType):
+            return self.schema(cls.__value__)
         class_schema = OpenAPISchemaObject(
             type="object",
             properties={},
             required=[],
             additionalProperties=False,
         )
-        openapi["components"]["schemas"][name] = class_schema
-
         for [key, item_cls] in get_type_hints(cls).items():
             item_schema: OpenAPISchema
             item_required = False
             if item_cls is NotRequired:
-                item_schema = get_or_create_schema(item_cls.__type__, openapi, types)
+                item_schema = self.schema(item_cls.__type__)
             elif isinstance(item_cls, UnionType) or get_origin(item_cls) is Union:
                 item_cls_args = [
                     item_cls_arg
@@ -104,37 +179,44 @@ def get_or_create_schema(
                     if item_cls_arg is not NoneType
                 ]
                 if len(item_cls_args) == 1:
-                    item_schema = get_or_create_schema(item_cls_args[0], openapi, types)
+                    item_schema = self.schema(item_cls_args[0])
                 else:
                     item_schema = OpenAPISchemaOneOf(
                         oneOf=[
-                            get_or_create_schema(item_clss_arg, openapi, types)
+                            self.schema(item_clss_arg)
                             for item_clss_arg in item_cls_args
                         ]
                     )
             else:
-                item_schema = get_or_create_schema(item_cls, openapi, types)
+                item_schema = self.schema(item_cls)
                 item_required = True
             class_schema["properties"][key] = item_schema
             if item_required:
                 class_schema["required"].append(key)
-        return {"$ref": f"#/components/schemas/{name}"}
-
-
-def internal_create_unique_name(
-    cls: Type, name: str, openapi: OpenAPI, types: dict[Type, str]
-) -> str:
-    if "components" not in openapi:
-        openapi["components"] = {}
-    if "schemas" not in openapi["components"]:
-        openapi["components"]["schemas"] = {}
+        return class_schema
 
-    new_name = name
-    count = 0
-    while new_name in openapi["components"]["schemas"]:
-        new_name = f"{name}{count}"
-        count += 1
+    def pydantic_schema(self, cls: type[BaseModel]) -> OpenAPISchema | None:
+        schemas = self.get_schemas()
+        schema: Any = cls.model_json_schema(ref_template=schema_ref_template)
+        definitions = schema.pop("$defs", {})
+        for name, definition in definitions.items():
+            if name in schemas and schemas[name] != definition:
+                return None
+        ref = schema.get("$ref")
+        if ref is None and cls.__name__ in schemas:
+            if schemas[cls.__name__] != schema:
+                return None
+            ref = f"#/components/schemas/{cls.__name__}"
+        schemas.update(definitions)
+        if ref is None:
+            name = self.unique_name(cls, cls.__name__)
+            schemas[name] = schema
+            return {"$ref": f"#/components/schemas/{name}"}
+        self.types[cls] = ref.rsplit("/", 1)[1]
+        return {"$ref": ref}
 
-    types[cls] = new_name
 
-    return new_name
+def get_or_create_schema(
+    cls: Type, openapi: OpenAPI, types: dict[Type, str]
+) -> OpenAPISchema:
+    return SchemaBuilder(openapi, types).build(cls)
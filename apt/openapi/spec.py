@@ -1,6 +1,6 @@
 from typing import Any, Literal, NotRequired, TypedDict, Union
 
-type OpenAPIIn = Literal["path", "query", "header"]
+type OpenAPIIn = Literal["path", "query", "header", "cookie"]
 type OpenAPIStringFormat = Union[
     Literal["data", "date-time", "password", "byte", "binary"],
     str,
@@ -160,9 +160,15 @@ class OpenAPIBodyContent(TypedDict):
     schema: NotRequired[OpenAPISchema]
 
 
+class OpenAPIHeader(TypedDict):
+    description: NotRequired[str]
+    schema: NotRequired[OpenAPISchema]
+
+
 class OpenAPIBody(TypedDict):
     description: NotRequired[str]
     required: NotRequired[Literal[True]]
+    headers: NotRequired[dict[str, OpenAPIHeader]]
     content: dict[str, OpenAPIBodyContent]
 
 
@@ -0,0 +1,4 @@
+from .stream import StreamBody, NDJSON, JSONArray, CSV, StreamFormat
+from .serialize import ResponseSerializer
+from .compression import Compressor, CompressionOptions, CompressionStats
+from .snapshot import ResponseSnapshot
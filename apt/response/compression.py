@@ -0,0 +1,147 @@
+import zlib
+from asyncio import get_running_loop
+from concurrent.futures import Executor
+from typing import Literal, NotRequired, TypedDict
+from aiohttp.hdrs import ACCEPT_ENCODING, CONTENT_ENCODING, VARY
+from aiohttp.web import ContentCoding, Request, Response, StreamResponse
+
+type CompressionEncoding = Literal["gzip", "deflate"]
+
+compressed_content_types = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/zstd",
+    "application/pdf",
+)
+
+encoding_wbits: dict[CompressionEncoding, int] = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+
+class CompressionOptions(TypedDict):
+    min_size: NotRequired[int]
+    offload_size: NotRequired[int]
+    level: NotRequired[int]
+    encodings: NotRequired[list[CompressionEncoding]]
+    executor: NotRequired[Executor | None]
+
+
+class CompressionStats:
+    responses: int
+    compressed: int
+    bytes_in: int
+    bytes_out: int
+
+    def __init__(self):
+        self.responses = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    def record(self, bytes_in: int, bytes_out: int, compressed: bool):
+        self.responses += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        if compressed:
+            self.compressed += 1
+
+
+def is_compressible(response: StreamResponse) -> bool:
+    if CONTENT_ENCODING in response.headers:
+        return False
+    if response.status < 200 or response.status in (204, 304):
+        return False
+    return not response.content_type.startswith(compressed_content_types)
+
+
+def compress(body: bytes, encoding: CompressionEncoding, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, encoding_wbits[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+class Compressor:
+    min_size: int
+    offload_size: int
+    level: int
+    encodings: list[CompressionEncoding]
+    executor: Executor | None
+    stats: CompressionStats
+
+    def __init__(self, options: CompressionOptions | None = None):
+        if options is None:
+            options = {}
+        self.min_size = options.get("min_size", 1024)
+        self.offload_size = options.get("offload_size", 64 * 1024)
+        self.level = options.get("level", 6)
+        self.encodings = options.get("encodings", ["gzip", "deflate"])
+        self.executor = options.get("executor")
+        self.stats = CompressionStats()
+
+    def negotiate(self, request: Request) -> CompressionEncoding | None:
+        accepted: dict[str, float] = {}
+        for encoding in request.headers.get(ACCEPT_ENCODING, "").split(","):
+            name, _, params = encoding.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip().lower()] = quality
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return None
+
+    async def compress(
+        self, request: Request, response: StreamResponse
+    ) -> StreamResponse:
+        if not isinstance(response, Response) or not isinstance(response.body, bytes):
+            return response
+        body = response.body
+        encoding = self.negotiate(request)
+        if (
+            encoding is None
+            or len(body) < self.min_size
+            or not is_compressible(response)
+        ):
+            self.stats.record(len(body), len(body), False)
+            return response
+        if len(body) >= self.offload_size:
+            compressed = await get_running_loop().run_in_executor(
+                self.executor, compress, body, encoding, self.level
+            )
+        else:
+            compressed = compress(body, encoding, self.level)
+        response.body = compressed
+        response.headers[CONTENT_ENCODING] = encoding
+        response.headers.add(VARY, ACCEPT_ENCODING)
+        self.stats.record(len(body), len(compressed), True)
+        return response
+
+    def vary(self, response: StreamResponse):
+        if ACCEPT_ENCODING not in response.headers.getall(VARY, ()):
+            response.headers.add(VARY, ACCEPT_ENCODING)
+
+    def enable(self, request: Request, response: StreamResponse) -> bool:
+        encoding = self.negotiate(request)
+        if encoding is None or not is_compressible(response):
+            return False
+        response.enable_compression(ContentCoding(encoding))
+        response.headers.add(VARY, ACCEPT_ENCODING)
+        return True
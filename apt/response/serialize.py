@@ -0,0 +1,123 @@
+from functools import partial
+from inspect import isclass
+from typing import Any, Callable, Type, get_origin
+from aiohttp.hdrs import ACCEPT, VARY
+from aiohttp.web import Response
+
+from apt import get_type_adapter
+from apt.extract.codec import Codec, is_json_codec, negotiate_codec
+
+type Serializer = Callable[[Any], bytes]
+type IncEx = set[int] | set[str] | dict[int, Any] | dict[str, Any]
+
+
+def is_json_content_type(content_type: str) -> bool:
+    return content_type == "application/json" or content_type.endswith("+json")
+
+
+def encode_text(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class ResponseSerializer:
+    status: int
+    content_type: str
+    response_type: Type | None
+    include: IncEx | None
+    exclude: IncEx | None
+    empty_status: int
+    serializers: dict[type, Serializer]
+    codec_serializers: dict[tuple[type, str], Serializer]
+
+    def __init__(
+        self,
+        status: int = 200,
+        content_type: str = "application/json",
+        response_type: Type | None = None,
+        include: IncEx | None = None,
+        exclude: IncEx | None = None,
+        empty_status: int = 204,
+    ):
+        self.status = status
+        self.content_type = content_type
+        self.response_type = response_type
+        self.include = include
+        self.exclude = exclude
+        self.empty_status = empty_status
+        self.serializers = {}
+        self.codec_serializers = {}
+
+    def matches_response_type(self, cls: type) -> bool:
+        if self.response_type is None:
+            return False
+        response_origin = get_origin(self.response_type) or self.response_type
+        return isclass(response_origin) and issubclass(cls, response_origin)
+
+    def compile(self, cls: type) -> Serializer:
+        serializer: Serializer
+        if not is_json_content_type(self.content_type) and (cls is str or cls is bytes):
+            serializer = encode_text
+        else:
+            response_type = (
+                self.response_type if self.matches_response_type(cls) else cls
+            )
+            serializer = partial(
+                get_type_adapter(response_type).dump_json,
+                include=self.include,
+                exclude=self.exclude,
+            )
+        self.serializers[cls] = serializer
+        return serializer
+
+    def negotiate(self, accept: str | None) -> Codec | None:
+        if not accept or not is_json_content_type(self.content_type):
+            return None
+        codec = negotiate_codec(accept)
+        return None if is_json_codec(codec) else codec
+
+    def compile_codec(self, cls: type, codec: Codec) -> Serializer:
+        response_type = self.response_type if self.matches_response_type(cls) else cls
+        dump_python = partial(
+            get_type_adapter(response_type).dump_python,
+            mode="json",
+            include=self.include,
+            exclude=self.exclude,
+        )
+        encode = codec.encode
+
+        def serializer(value: Any) -> bytes:
+            return encode(dump_python(value))
+
+        self.codec_serializers[(cls, codec.content_type)] = serializer
+        return serializer
+
+    def __call__(self, value: Any, accept: str | None = None) -> Response:
+        if value is None:
+            return Response(status=self.empty_status)
+        cls = type(value)
+        codec = self.negotiate(accept)
+        if codec is not None:
+            serializer = self.codec_serializers.get((cls, codec.content_type))
+            if serializer is None:
+                serializer = self.compile_codec(cls, codec)
+            return Response(
+                status=self.status,
+                body=serializer(value),
+                content_type=codec.content_type,
+                headers={VARY: ACCEPT},
+            )
+        serializer = self.serializers.get(cls)
+        if serializer is None:
+            serializer = self.compile(cls)
+        if is_json_content_type(self.content_type):
+            return Response(
+                status=self.status,
+                body=serializer(value),
+                content_type=self.content_type,
+                headers={VARY: ACCEPT},
+            )
+        return Response(
+            status=self.status, body=serializer(value), content_type=self.content_type
+        )
@@ -0,0 +1,41 @@
+from typing import NamedTuple
+from aiohttp.web import Response, StreamResponse
+
+
+class ResponseSnapshot(NamedTuple):
+    status: int
+    content_type: str
+    charset: str | None
+    headers: tuple[tuple[str, str], ...]
+    body: bytes
+
+    @staticmethod
+    def from_response(response: StreamResponse) -> "ResponseSnapshot | None":
+        if not isinstance(response, Response) or not isinstance(response.body, bytes):
+            return None
+        return ResponseSnapshot(
+            response.status,
+            response.content_type,
+            response.charset,
+            tuple(
+                (name, value)
+                for name, value in response.headers.items()
+                if name.lower() not in ("content-type", "content-length")
+            ),
+            response.body,
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(
+            len(name) + len(value) for name, value in self.headers
+        )
+
+    def into_response(self) -> Response:
+        return Response(
+            status=self.status,
+            body=self.body,
+            content_type=self.content_type,
+            charset=self.charset,
+            headers=self.headers,
+        )
@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+from csv import writer
+from io import StringIO
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Generic,
+    Iterable,
+    Literal,
+    Type,
+    TypeVar,
+)
+from aiohttp.typedefs import LooseHeaders
+from aiohttp.web import Request, StreamResponse
+from pydantic import BaseModel
+
+from apt import get_type_adapter
+from apt.openapi import OpenAPI, OpenAPIBody, OpenAPISchemaArray, get_or_create_schema
+from apt.response.compression import Compressor
+
+T = TypeVar("T")
+
+type StreamFormat = Literal["ndjson", "json", "csv"]
+
+default_buffer_size = 16 * 1024
+
+
+async def iterate(items: AsyncIterable[T] | Iterable[T]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+class StreamBody(ABC, Generic[T]):
+    content_type: str
+    items: AsyncIterable[T] | Iterable[T]
+    status: int
+    headers: LooseHeaders | None
+    buffer_size: int
+
+    def __init__(
+        self,
+        items: AsyncIterable[T] | Iterable[T],
+        status: int = 200,
+        headers: LooseHeaders | None = None,
+        buffer_size: int = default_buffer_size,
+    ):
+        self.items = items
+        self.status = status
+        self.headers = headers
+        self.buffer_size = buffer_size
+
+    def start(self) -> bytes:
+        return b""
+
+    @abstractmethod
+    def encode(self, item: T, index: int) -> bytes: ...
+
+    def end(self, count: int) -> bytes:
+        return b""
+
+    async def into_response(
+        self, request: Request, compressor: Compressor | None = None
+    ) -> StreamResponse:
+        response = StreamResponse(status=self.status, headers=self.headers)
+        response.content_type = self.content_type
+        response.enable_chunked_encoding()
+        compressed = compressor is not None and compressor.enable(request, response)
+        await response.prepare(request)
+
+        buffer = bytearray(self.start())
+        count = 0
+        size = 0
+        async for item in iterate(self.items):
+            buffer += self.encode(item, count)
+            count += 1
+            if len(buffer) >= self.buffer_size:
+                size += len(buffer)
+                await response.write(buffer)
+                buffer = bytearray()
+        buffer += self.end(count)
+        if buffer:
+            size += len(buffer)
+            await response.write(buffer)
+        await response.write_eof()
+        if compressor is not None:
+            compressor.stats.record(size, response.body_length, compressed)
+        return response
+
+    @staticmethod
+    @abstractmethod
+    def into_openapi(
+        item_type: Type, openapi: OpenAPI, types: dict[Type, str]
+    ) -> OpenAPIBody: ...
+
+
+class JSONStreamBody(StreamBody[T]):
+    item_type: type | None = None
+    dump_json: Any = None
+
+    def dump(self, item: T) -> bytes:
+        item_type = type(item)
+        if item_type is not self.item_type:
+            self.item_type = item_type
+            self.dump_json = get_type_adapter(item_type).dump_json
+        return self.dump_json(item)
+
+
+class NDJSON(JSONStreamBody[T]):
+    content_type = "application/x-ndjson"
+
+    def encode(self, item: T, index: int) -> bytes:
+        return self.dump(item) + b"\n"
+
+    @staticmethod
+    def into_openapi(
+        item_type: Type, openapi: OpenAPI, types: dict[Type, str]
+    ) -> OpenAPIBody:
+        return {
+            "content": {
+                NDJSON.content_type: {
+                    "schema": get_or_create_schema(item_type, openapi, types)
+                }
+            }
+        }
+
+
+class JSONArray(JSONStreamBody[T]):
+    content_type = "application/json"
+
+    def start(self) -> bytes:
+        return b"["
+
+    def encode(self, item: T, index: int) -> bytes:
+        if index == 0:
+            return self.dump(item)
+        return b"," + self.dump(item)
+
+    def end(self, count: int) -> bytes:
+        return b"]"
+
+    @staticmethod
+    def into_openapi(
+        item_type: Type, openapi: OpenAPI, types: dict[Type, str]
+    ) -> OpenAPIBody:
+        return {
+            "content": {
+                JSONArray.content_type: {
+                    "schema": OpenAPISchemaArray(
+                        type="array",
+                        items=get_or_create_schema(item_type, openapi, types),
+                    )
+                }
+            }
+        }
+
+
+class CSV(StreamBody[T]):
+    content_type = "text/csv"
+    output: StringIO
+    rows: Any
+
+    def __init__(
+        self,
+        items: AsyncIterable[T] | Iterable[T],
+        status: int = 200,
+        headers: LooseHeaders | None = None,
+        buffer_size: int = default_buffer_size,
+    ):
+        super().__init__(items, status, headers, buffer_size)
+        self.output = StringIO()
+        self.rows = writer(self.output)
+
+    def encode(self, item: T, index: int) -> bytes:
+        row: Any = item
+        if isinstance(item, BaseModel):
+            row = item.model_dump(mode="json")
+        if isinstance(row, dict):
+            if index == 0:
+                self.rows.writerow(row.keys())
+            row = row.values()
+        self.rows.writerow(row)
+        text = self.output.getvalue()
+        self.output.seek(0)
+        self.output.truncate()
+        return text.encode()
+
+    @staticmethod
+    def into_openapi(
+        item_type: Type, openapi: OpenAPI, types: dict[Type, str]
+    ) -> OpenAPIBody:
+        return {"content": {CSV.content_type: {"schema": {"type": "string"}}}}
+
+
+stream_formats: dict[StreamFormat, type[StreamBody]] = {
+    "ndjson": NDJSON,
+    "json": JSONArray,
+    "csv": CSV,
+}
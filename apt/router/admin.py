@@ -0,0 +1,59 @@
+from typing import Any
+from aiohttp.web import Response
+
+from apt.extract import JSON, Path, Query
+from apt.router.endpoint import endpoint
+from apt.router.profile import (
+    ProfileFormat,
+    ProfileSettings,
+    Profiler,
+    default_profiler,
+)
+from apt.router.router import Router
+
+
+def profile_router(
+    profiler: Profiler | None = None, prefix: str = "/_profile"
+) -> Router:
+    if profiler is None:
+        profiler = default_profiler
+
+    @endpoint(path="", method="GET", metrics=False, rate_limit=False)
+    async def list_profiles() -> list[dict[str, Any]]:
+        return profiler.summary()
+
+    @endpoint(path="/enable", method="POST", metrics=False, rate_limit=False)
+    async def enable_profiling(settings: JSON[ProfileSettings]) -> None:
+        profiler.enable(settings.value)
+
+    @endpoint(path="/disable", method="POST", metrics=False, rate_limit=False)
+    async def disable_profiling(settings: JSON[ProfileSettings]) -> None:
+        profiler.disable(settings.value)
+
+    @endpoint(path="/{id}", method="GET", metrics=False, rate_limit=False)
+    async def download_profile(id: Path[int], query: Query[ProfileFormat]) -> Response:
+        profile = profiler.get(id.value)
+        if profile is None:
+            return Response(status=404, text="Profile not found")
+        filename = f"{profile.method}-{profile.id}"
+        if query.value.format == "collapsed":
+            return Response(
+                text=profile.into_collapsed(),
+                content_type="text/plain",
+                headers={
+                    "Content-Disposition": f'attachment; filename="{filename}.folded"'
+                },
+            )
+        return Response(
+            body=profile.into_pstats(),
+            content_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.prof"'},
+        )
+
+    return (
+        Router(prefix)
+        .add(list_profiles)
+        .add(enable_profiling)
+        .add(disable_profiling)
+        .add(download_profile)
+    )
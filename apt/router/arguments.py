@@ -0,0 +1,139 @@
+from asyncio import FIRST_COMPLETED, Task, create_task, gather, wait
+from typing import Any, Callable, Coroutine, NamedTuple
+from aiohttp.web import Request, Response
+from result import Err, Ok, Result, is_err
+
+from apt.extract.extract import Extractor
+
+type ArgumentsExtractor = Callable[
+    [Request], Coroutine[Any, Any, Result[dict[str, Any], Any]]
+]
+
+
+async def extract_request(request: Request) -> Result[Request, Response]:
+    return Ok(request)
+
+
+class HandlerArgument(NamedTuple):
+    name: str
+    cls: Any
+    args: tuple[Any, ...]
+    extract: Extractor
+    index: int
+    reads_body: bool
+    is_cheap: bool
+    is_concurrent: bool
+    needs_close: bool
+
+
+class ArgumentError(NamedTuple):
+    index: int
+    error: Any
+
+
+async def extract_sequential(
+    arguments: tuple[HandlerArgument, ...], request: Request, args: dict[str, Any]
+) -> ArgumentError | None:
+    for argument in arguments:
+        value = await argument.extract(request)
+        if is_err(value):
+            return ArgumentError(argument.index, value.err())
+        args[argument.name] = value.ok()
+    return None
+
+
+async def extract_concurrent(
+    groups: tuple[tuple[HandlerArgument, ...], ...],
+    request: Request,
+    args: dict[str, Any],
+) -> ArgumentError | None:
+    tasks: dict[Task, int] = {
+        create_task(extract_sequential(group, request, args)): group[0].index
+        for group in groups
+    }
+    pending = set(tasks)
+    first_error: ArgumentError | None = None
+    try:
+        while pending:
+            done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                error = task.result()
+                if error is None:
+                    continue
+                if first_error is None or error.index < first_error.index:
+                    first_error = error
+            if first_error is not None:
+                for task in pending:
+                    if tasks[task] > first_error.index:
+                        task.cancel()
+        return first_error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await gather(*pending, return_exceptions=True)
+
+
+def close_arguments(args: dict[str, Any], cleanup: tuple[str, ...]):
+    for name in cleanup:
+        value = args.get(name)
+        if value is not None:
+            value.close()
+
+
+def compile_arguments(arguments: tuple[HandlerArgument, ...]) -> ArgumentsExtractor:
+    cleanup = tuple(argument.name for argument in arguments if argument.needs_close)
+    cheap = tuple(argument for argument in arguments if argument.is_cheap)
+    sequential = tuple(
+        argument
+        for argument in arguments
+        if not argument.is_cheap and (argument.reads_body or not argument.is_concurrent)
+    )
+    groups = tuple(
+        (argument,)
+        for argument in arguments
+        if not argument.is_cheap and not argument.reads_body and argument.is_concurrent
+    )
+    if sequential:
+        groups = tuple(sorted((*groups, sequential), key=lambda group: group[0].index))
+
+    if len(groups) <= 1:
+
+        async def extract(request: Request) -> Result[dict[str, Any], Any]:
+            args: dict[str, Any] = {}
+            for argument in arguments:
+                value = await argument.extract(request)
+                if is_err(value):
+                    close_arguments(args, cleanup)
+                    return value
+                args[argument.name] = value.ok()
+            return Ok(args)
+
+        return extract
+
+    async def extract_concurrently(request: Request) -> Result[dict[str, Any], Any]:
+        args: dict[str, Any] = {}
+        error = await extract_sequential(cheap, request, args)
+        if error is None:
+            error = await extract_concurrent(groups, request, args)
+        else:
+            earlier = tuple(
+                group
+                for group in (
+                    tuple(
+                        argument for argument in group if argument.index < error.index
+                    )
+                    for group in groups
+                )
+                if group
+            )
+            if earlier:
+                error = await extract_concurrent(earlier, request, args) or error
+        if error is not None:
+            close_arguments(args, cleanup)
+            return Err(error.error)
+        return Ok(args)
+
+    return extract_concurrently
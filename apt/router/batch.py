@@ -0,0 +1,243 @@
+import json
+from asyncio import Semaphore, gather, get_running_loop
+from typing import Any, Callable, Coroutine, Literal
+from aiohttp import StreamReader
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.hdrs import (
+    ACCEPT,
+    ACCEPT_ENCODING,
+    CONTENT_ENCODING,
+    CONTENT_LENGTH,
+    CONTENT_TYPE,
+    TRANSFER_ENCODING,
+)
+from aiohttp.http import RawRequestMessage
+from aiohttp.web import HTTPException, Request, Response
+from multidict import CIMultiDict, CIMultiDictProxy, MultiDict
+from pydantic import BaseModel, ValidationError
+from yarl import URL
+
+from apt import get_type_adapter
+from apt.router.endpoint import endpoint
+
+batch_state_key = "apt.batch"
+safe_methods = ("GET", "HEAD", "OPTIONS")
+skipped_headers = (
+    ACCEPT,
+    ACCEPT_ENCODING,
+    CONTENT_ENCODING,
+    CONTENT_LENGTH,
+    CONTENT_TYPE,
+    TRANSFER_ENCODING,
+)
+
+
+class BatchRequest(BaseModel):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"] = "GET"
+    path: str
+    query: dict[str, str | list[str]] | None = None
+    headers: dict[str, str] | None = None
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    status: int
+    headers: dict[str, str]
+    body: Any
+
+
+class BatchWriter(AbstractStreamWriter):
+    headers: CIMultiDict[str] | None
+    chunks: list[bytes]
+
+    def __init__(self):
+        self.headers = None
+        self.chunks = []
+
+    async def write(self, chunk: bytes | bytearray | memoryview) -> None:
+        self.chunks.append(bytes(chunk))
+        self.buffer_size += len(chunk)
+        self.output_size += len(chunk)
+
+    async def write_eof(self, chunk: bytes = b"") -> None:
+        if chunk:
+            await self.write(chunk)
+
+    async def drain(self) -> None:
+        pass
+
+    def enable_compression(
+        self, encoding: str = "deflate", strategy: int | None = None
+    ) -> None:
+        pass
+
+    def enable_chunking(self) -> None:
+        pass
+
+    async def write_headers(self, status_line: str, headers: CIMultiDict[str]) -> None:
+        self.headers = headers
+
+    def body(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def batch_url(item: BatchRequest) -> URL:
+    url = URL(item.path)
+    if item.query:
+        query = MultiDict[str]()
+        for key, value in item.query.items():
+            if isinstance(value, list):
+                for entry in value:
+                    query.add(key, entry)
+            else:
+                query.add(key, value)
+        url = url.extend_query(query)
+    return url
+
+
+def batch_request(request: Request, item: BatchRequest, writer: BatchWriter) -> Request:
+    loop = get_running_loop()
+    headers = CIMultiDict[str](
+        (key, value)
+        for key, value in request.headers.items()
+        if key not in skipped_headers
+    )
+    body = b""
+    if item.body is not None:
+        body = json.dumps(item.body, separators=(",", ":")).encode()
+        headers[CONTENT_TYPE] = "application/json"
+        headers[CONTENT_LENGTH] = str(len(body))
+    if item.headers:
+        headers.update(item.headers)
+    url = batch_url(item)
+    message = RawRequestMessage(
+        item.method,
+        str(url),
+        request.version,
+        CIMultiDictProxy(headers),
+        tuple((key.encode(), value.encode()) for key, value in headers.items()),
+        False,
+        None,
+        False,
+        False,
+        url,
+    )
+    payload = StreamReader(request.protocol, max(len(body), 2**16), loop=loop)
+    if body:
+        payload.feed_data(body)
+    payload.feed_eof()
+    sub_request = Request(
+        message,
+        payload,
+        request.protocol,
+        writer,
+        request.task,
+        loop,
+        remote=request.remote,
+    )
+    sub_request[batch_state_key] = True
+    return sub_request
+
+
+def encode_body(content_type: str, body: bytes) -> bytes:
+    if not body:
+        return b"null"
+    elif content_type == "application/json" or content_type.endswith("+json"):
+        return body
+    return json.dumps(body.decode(errors="replace")).encode()
+
+
+def encode_response(
+    status: int, headers: CIMultiDict[str], content_type: str, body: bytes
+) -> bytes:
+    return b"".join(
+        (
+            b'{"status":',
+            str(status).encode(),
+            b',"headers":',
+            json.dumps(dict(headers), separators=(",", ":")).encode(),
+            b',"body":',
+            encode_body(content_type, body),
+            b"}",
+        )
+    )
+
+
+async def dispatch_batch_request(request: Request, item: BatchRequest) -> bytes:
+    writer = BatchWriter()
+    sub_request = batch_request(request, item, writer)
+    try:
+        response = await request.match_info.apps[0]._handle(sub_request)
+    except HTTPException as e:
+        return encode_response(
+            e.status, CIMultiDict(e.headers), e.content_type, (e.text or "").encode()
+        )
+    except Exception as e:
+        return encode_response(500, CIMultiDict(), "text/plain", str(e).encode())
+    if isinstance(response, Response) and not response.prepared:
+        body = response.body if isinstance(response.body, bytes) else None
+        if body is not None:
+            return encode_response(
+                response.status, response.headers, response.content_type, body
+            )
+    if not response.prepared:
+        await response.prepare(sub_request)
+        await response.write_eof()
+    return encode_response(
+        response.status,
+        writer.headers if writer.headers is not None else response.headers,
+        response.content_type,
+        writer.body(),
+    )
+
+
+def batch_endpoint(
+    path: str = "/batch",
+    max_requests: int = 50,
+    max_concurrency: int = 8,
+) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+    validate_json = get_type_adapter(list[BatchRequest]).validate_json
+
+    @endpoint(
+        path=path,
+        method="POST",
+        request_body=("application/json", list[BatchRequest]),
+        responses={
+            200: ("application/json", list[BatchResponse]),
+            400: ("text/plain", str),
+            413: ("text/plain", str),
+        },
+    )
+    async def batch(request: Request) -> Response:
+        if request.get(batch_state_key):
+            return Response(status=400, text="Batch requests cannot be nested")
+        try:
+            items = validate_json(await request.read())
+        except ValidationError as err:
+            return Response(status=400, text=err.json())
+        if len(items) > max_requests:
+            return Response(
+                status=413, text=f"Batch is limited to {max_requests} requests"
+            )
+        semaphore = Semaphore(max_concurrency)
+
+        async def run(item: BatchRequest) -> bytes:
+            async with semaphore:
+                return await dispatch_batch_request(request, item)
+
+        responses: list[bytes] = []
+        pending: list[BatchRequest] = []
+        for item in items:
+            if item.method in safe_methods:
+                pending.append(item)
+                continue
+            responses.extend(await gather(*(run(entry) for entry in pending)))
+            pending.clear()
+            responses.append(await dispatch_batch_request(request, item))
+        responses.extend(await gather(*(run(entry) for entry in pending)))
+        return Response(
+            body=b"[" + b",".join(responses) + b"]",
+            content_type="application/json",
+        )
+
+    return batch
@@ -0,0 +1,103 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Coroutine, NotRequired, TypedDict
+from aiohttp.web import Response
+
+
+class BlockingOptions(TypedDict):
+    max_workers: NotRequired[int]
+    max_queue: NotRequired[int | None]
+
+
+class BlockingStats:
+    submitted: int
+    completed: int
+    rejected: int
+    queued: int
+    running: int
+    max_queued: int
+    wait_time: float
+    max_wait: float
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        started = self.completed + self.running
+        return self.wait_time / started if started else 0.0
+
+
+class BlockingExecutor:
+    max_workers: int
+    max_queue: int | None
+    executor: ThreadPoolExecutor
+    stats: BlockingStats
+    lock: Lock
+
+    def __init__(self, options: BlockingOptions | None = None):
+        if options is None:
+            options = {}
+        self.max_workers = options.get("max_workers", 16)
+        self.max_queue = options.get("max_queue")
+        self.executor = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="apt-blocking"
+        )
+        self.stats = BlockingStats()
+        self.lock = Lock()
+
+    def invoke(
+        self, func: Callable[..., Any], kwargs: dict[str, Any], submitted: float
+    ):
+        wait = perf_counter() - submitted
+        with self.lock:
+            self.stats.queued -= 1
+            self.stats.running += 1
+            self.stats.wait_time += wait
+            if wait > self.stats.max_wait:
+                self.stats.max_wait = wait
+        try:
+            return func(**kwargs)
+        finally:
+            with self.lock:
+                self.stats.running -= 1
+                self.stats.completed += 1
+
+    async def run(self, func: Callable[..., Any], kwargs: dict[str, Any]) -> Any:
+        with self.lock:
+            if self.max_queue is not None and self.stats.queued >= self.max_queue:
+                self.stats.rejected += 1
+                return Response(status=503, headers={"Retry-After": "1"})
+            self.stats.submitted += 1
+            self.stats.queued += 1
+            if self.stats.queued > self.stats.max_queued:
+                self.stats.max_queued = self.stats.queued
+        context = copy_context()
+        return await get_running_loop().run_in_executor(
+            self.executor, context.run, self.invoke, func, kwargs, perf_counter()
+        )
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Coroutine[Any, Any, Any]]:
+        async def call(**kwargs: Any) -> Any:
+            return await self.run(func, kwargs)
+
+        return call
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+
+@lru_cache(maxsize=None)
+def default_blocking_executor() -> BlockingExecutor:
+    return BlockingExecutor()
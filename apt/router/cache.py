@@ -0,0 +1,207 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    NamedTuple,
+    NotRequired,
+    TypedDict,
+)
+from weakref import WeakSet
+from aiohttp.hdrs import AGE, CACHE_CONTROL, SET_COOKIE
+from aiohttp.web import Request, Response, StreamResponse
+from pydantic import BaseModel
+
+from apt.response.snapshot import ResponseSnapshot
+
+type CacheKey = Callable[[dict[str, Any]], Hashable]
+type CacheTags = Iterable[str] | Callable[[dict[str, Any]], Iterable[str]]
+
+entry_overhead = 256
+uncacheable_directives = ("no-store", "private", "no-cache")
+
+
+class CacheOptions(TypedDict):
+    ttl: NotRequired[float]
+    max_bytes: NotRequired[int]
+    key: NotRequired[CacheKey]
+    tags: NotRequired[CacheTags]
+    cache_control: NotRequired[str | bool]
+
+
+class CachedResponse(NamedTuple):
+    snapshot: ResponseSnapshot
+    created: float
+    expires: float
+    tags: frozenset[str]
+    size: int
+
+
+class CacheStats:
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def cache_key_value(value: Any) -> Hashable:
+    if isinstance(value, Request):
+        return str(value.rel_url)
+    elif isinstance(value, BaseModel):
+        return value.model_dump_json()
+    elif hasattr(value, "value"):
+        return cache_key_value(value.value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(cache_key_value(item) for item in value)
+    elif isinstance(value, dict):
+        return tuple(
+            sorted((key, cache_key_value(item)) for key, item in value.items())
+        )
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def default_cache_key(args: dict[str, Any]) -> Hashable:
+    return tuple((name, cache_key_value(value)) for name, value in args.items())
+
+
+def is_cacheable(response: StreamResponse) -> bool:
+    if response.status != 200 or SET_COOKIE in response.headers:
+        return False
+    cache_control = response.headers.get(CACHE_CONTROL, "").lower()
+    return not any(directive in cache_control for directive in uncacheable_directives)
+
+
+def bypasses_cache(request: Request) -> bool:
+    cache_control = request.headers.get(CACHE_CONTROL, "").lower()
+    return "no-cache" in cache_control or "no-store" in cache_control
+
+
+caches: WeakSet["ResponseCache"] = WeakSet()
+
+
+class ResponseCache:
+    ttl: float
+    max_bytes: int
+    key: CacheKey
+    tags: CacheTags
+    cache_control: str | None
+    entries: OrderedDict[Hashable, CachedResponse]
+    tagged: dict[str, set[Hashable]]
+    size: int
+    stats: CacheStats
+
+    def __init__(self, options: CacheOptions | None = None):
+        if options is None:
+            options = {}
+        self.ttl = options.get("ttl", 60.0)
+        self.max_bytes = options.get("max_bytes", 16 * 1024 * 1024)
+        self.key = options.get("key", default_cache_key)
+        self.tags = options.get("tags", ())
+        cache_control = options.get("cache_control", True)
+        if cache_control is True:
+            self.cache_control = f"max-age={int(self.ttl)}"
+        elif cache_control is False:
+            self.cache_control = None
+        else:
+            self.cache_control = cache_control
+        self.entries = OrderedDict()
+        self.tagged = {}
+        self.size = 0
+        self.stats = CacheStats()
+        caches.add(self)
+
+    def remove(self, key: Hashable) -> CachedResponse | None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.size -= entry.size
+        for tag in entry.tags:
+            keys = self.tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tagged[tag]
+        return entry
+
+    def get(self, key: Hashable) -> Response | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        now = monotonic()
+        if entry.expires <= now:
+            self.remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats.hits += 1
+        response = entry.snapshot.into_response()
+        response.headers[AGE] = str(int(now - entry.created))
+        return response
+
+    def get_tags(self, args: dict[str, Any]) -> frozenset[str]:
+        if callable(self.tags):
+            return frozenset(self.tags(args))
+        return frozenset(self.tags)
+
+    def store(self, key: Hashable, response: StreamResponse, args: dict[str, Any]):
+        snapshot = ResponseSnapshot.from_response(response)
+        if snapshot is None or not is_cacheable(response):
+            return
+        if self.cache_control is not None and CACHE_CONTROL not in response.headers:
+            response.headers[CACHE_CONTROL] = self.cache_control
+            snapshot = snapshot._replace(
+                headers=(*snapshot.headers, (CACHE_CONTROL, self.cache_control))
+            )
+        size = snapshot.size + entry_overhead
+        if size > self.max_bytes:
+            return
+        self.remove(key)
+        now = monotonic()
+        tags = self.get_tags(args)
+        self.entries[key] = CachedResponse(snapshot, now, now + self.ttl, tags, size)
+        self.size += size
+        for tag in tags:
+            self.tagged.setdefault(tag, set()).add(key)
+        self.stats.stores += 1
+        while self.size > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+            self.stats.evictions += 1
+
+    def invalidate(self, tag: str) -> int:
+        keys = self.tagged.pop(tag, set())
+        for key in keys:
+            self.remove(key)
+        self.stats.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        self.entries.clear()
+        self.tagged.clear()
+        self.size = 0
+
+
+def invalidate(tag: str) -> int:
+    return sum(cache.invalidate(tag) for cache in list(caches))
@@ -0,0 +1,115 @@
+from asyncio import CancelledError, Task, create_task, shield
+from typing import Any, Callable, Coroutine, Hashable, NotRequired, TypedDict
+from aiohttp.hdrs import ACCEPT, AUTHORIZATION, COOKIE
+from aiohttp.web import Request, StreamResponse
+
+from apt.response.snapshot import ResponseSnapshot
+
+type CoalesceKey = Callable[[Request], Hashable]
+type Producer = Callable[[Request, dict[str, Any]], Coroutine[Any, Any, StreamResponse]]
+
+
+class CoalesceOptions(TypedDict):
+    headers: NotRequired[list[str]]
+    key: NotRequired[CoalesceKey]
+
+
+class CoalesceStats:
+    leaders: int
+    followers: int
+    cancelled: int
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self.cancelled = 0
+
+
+def coalesce_key(request: Request, headers: tuple[str, ...] = ()) -> Hashable:
+    return (
+        request.method,
+        request.path,
+        tuple(sorted(request.query.items())),
+        request.headers.get(ACCEPT),
+        request.headers.get(AUTHORIZATION),
+        request.headers.get(COOKIE),
+        tuple(request.headers.get(header) for header in headers),
+    )
+
+
+class Flight:
+    request: Request
+    task: Task[StreamResponse]
+    snapshot: ResponseSnapshot | None
+    waiters: int
+
+    def __init__(self, request: Request, task: Task[StreamResponse]):
+        self.request = request
+        self.task = task
+        self.snapshot = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    headers: tuple[str, ...]
+    key: CoalesceKey
+    flights: dict[Hashable, Flight]
+    stats: CoalesceStats
+
+    def __init__(self, options: CoalesceOptions | None = None):
+        if options is None:
+            options = {}
+        self.headers = tuple(options.get("headers", ()))
+        self.key = options.get("key", self.default_key)
+        self.flights = {}
+        self.stats = CoalesceStats()
+
+    def default_key(self, request: Request) -> Hashable:
+        return coalesce_key(request, self.headers)
+
+    def start(
+        self, key: Hashable, produce: Producer, request: Request, kwargs: dict[str, Any]
+    ) -> Flight:
+        flight = Flight(request, create_task(produce(request, kwargs)))
+
+        def land(task: Task[StreamResponse]):
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            if not task.cancelled() and task.exception() is None:
+                flight.snapshot = ResponseSnapshot.from_response(task.result())
+
+        flight.task.add_done_callback(land)
+        self.flights[key] = flight
+        self.stats.leaders += 1
+        return flight
+
+    def leave(self, key: Hashable, flight: Flight):
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+            flight.task.cancel()
+            self.stats.cancelled += 1
+
+    def wrap(self, produce: Producer) -> Producer:
+        async def coalesced(request: Request, kwargs: dict[str, Any]) -> StreamResponse:
+            key = self.key(request)
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.start(key, produce, request, kwargs)
+            else:
+                self.stats.followers += 1
+            flight.waiters += 1
+            try:
+                response = await shield(flight.task)
+            except CancelledError:
+                self.leave(key, flight)
+                raise
+            flight.waiters -= 1
+            if flight.request is request:
+                return response
+            elif flight.snapshot is not None:
+                return flight.snapshot.into_response()
+            return await produce(request, kwargs)
+
+        return coalesced
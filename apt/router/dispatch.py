@@ -0,0 +1,160 @@
+import re
+from typing import Any, Callable, Coroutine
+from aiohttp.web import (
+    AbstractRouteDef,
+    HTTPMethodNotAllowed,
+    HTTPNotFound,
+    Request,
+    StreamResponse,
+    route,
+)
+
+type Handle = Callable[[Request], Coroutine[Any, Any, StreamResponse]]
+type Params = dict[str, str]
+
+placeholder_regex = re.compile(
+    r"\{(?P<name>[^{}:]+)(?::(?P<regex>(?:[^{}]|\{[^{}]*\})+))?\}"
+)
+
+
+def split_path_pattern(path_pattern: str) -> list[str]:
+    segments: list[str] = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(path_pattern):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == "/" and depth == 0:
+            segments.append(path_pattern[start:index])
+            start = index + 1
+    segments.append(path_pattern[start:])
+    return segments
+
+
+def segment_regex(segment: str) -> re.Pattern[str]:
+    pattern = ""
+    position = 0
+    for match in placeholder_regex.finditer(segment):
+        pattern += re.escape(segment[position : match.start()])
+        regex = match.group("regex") or "[^/]+"
+        pattern += f"(?P<{match.group('name')}>{regex})"
+        position = match.end()
+    pattern += re.escape(segment[position:])
+    return re.compile(pattern)
+
+
+class Node:
+    static: dict[str, "Node"]
+    params: list[tuple[str, "Node"]]
+    patterns: list[tuple[re.Pattern[str], "Node"]]
+    tails: list[tuple[re.Pattern[str], "Node"]]
+    handlers: dict[str, Handle]
+
+    def __init__(self):
+        self.static = {}
+        self.params = []
+        self.patterns = []
+        self.tails = []
+        self.handlers = {}
+
+    def child(self, segment: str, last: bool) -> "Node":
+        if "{" not in segment:
+            node = self.static.get(segment)
+            if node is None:
+                node = Node()
+                self.static[segment] = node
+            return node
+        match = placeholder_regex.fullmatch(segment)
+        if match is not None and match.group("regex") is None:
+            name = match.group("name")
+            for param, node in self.params:
+                if param == name:
+                    return node
+            node = Node()
+            self.params.append((name, node))
+            return node
+        regex = segment_regex(segment)
+        children = self.tails if last else self.patterns
+        for pattern, node in children:
+            if pattern.pattern == regex.pattern:
+                return node
+        node = Node()
+        children.append((regex, node))
+        return node
+
+    def lookup(self, parts: list[str], index: int, params: Params) -> "Node | None":
+        if index == len(parts):
+            return self if self.handlers else None
+        part = parts[index]
+        node = self.static.get(part)
+        if node is not None:
+            found = node.lookup(parts, index + 1, params)
+            if found is not None:
+                return found
+        if part:
+            for name, node in self.params:
+                found = node.lookup(parts, index + 1, params)
+                if found is not None:
+                    params[name] = part
+                    return found
+        for regex, node in self.patterns:
+            match = regex.fullmatch(part)
+            if match is not None:
+                found = node.lookup(parts, index + 1, params)
+                if found is not None:
+                    params.update(match.groupdict())
+                    return found
+        if self.tails:
+            rest = "/".join(parts[index:])
+            for regex, node in self.tails:
+                match = regex.fullmatch(rest)
+                if match is not None and node.handlers:
+                    params.update(match.groupdict())
+                    return node
+        return None
+
+
+class Dispatcher:
+    root: Node
+    size: int
+
+    def __init__(self):
+        self.root = Node()
+        self.size = 0
+
+    def add(self, method: str, path_pattern: str, handle: Handle) -> "Dispatcher":
+        segments = split_path_pattern(path_pattern)
+        node = self.root
+        for index, segment in enumerate(segments):
+            node = node.child(segment, index == len(segments) - 1)
+        method = method.upper()
+        if method in node.handlers:
+            raise ValueError(f"Duplicate route: {method} {path_pattern}")
+        node.handlers[method] = handle
+        self.size += 1
+        return self
+
+    def resolve(self, path: str) -> tuple[dict[str, Handle], Params] | None:
+        params: Params = {}
+        node = self.root.lookup(path.split("/"), 0, params)
+        if node is None:
+            return None
+        return node.handlers, params
+
+    async def handle(self, request: Request) -> StreamResponse:
+        resolved = self.resolve(request.path)
+        if resolved is None:
+            raise HTTPNotFound()
+        handlers, params = resolved
+        handle = handlers.get(request.method)
+        if handle is None and request.method == "HEAD":
+            handle = handlers.get("GET")
+        if handle is None:
+            raise HTTPMethodNotAllowed(request.method, list(handlers))
+        request.match_info.update(params)
+        return await handle(request)
+
+    def into_route(self, path_pattern: str = "/{path:.*}") -> AbstractRouteDef:
+        return route("*", path_pattern, self.handle)
@@ -18,6 +18,12 @@ from apt.openapi import (
     get_or_create_schema,
 )
 from apt import to_camel_case
+from apt.response.compression import CompressionOptions
+from apt.response.serialize import IncEx
+from apt.router.cache import CacheOptions
+from apt.router.coalesce import CoalesceOptions
+from apt.router.limit import RateLimitOptions
+from apt.response.stream import StreamFormat
 
 __endpoint_options_attr_key__ = "__endpoint_options__"
 
@@ -76,6 +82,19 @@ EndpointBody = Union[Type, tuple[str, Type], EndpointBodyDict, OpenAPIBody, None
 EndpointResponses = dict[int, EndpointBody]
 
 
+def endpoint_body_type(endpoint_body: EndpointBody) -> tuple[str, Type] | None:
+    if isclass(endpoint_body):
+        return "application/json", endpoint_body
+    elif isinstance(endpoint_body, tuple):
+        return endpoint_body[0], endpoint_body[1]
+    elif is_endpoint_body_dict(endpoint_body):
+        content_type = endpoint_body.get("content_type", "application/json")
+        if "type" in endpoint_body:
+            return content_type, endpoint_body["type"]
+        return content_type, list[endpoint_body["items"]]
+    return None
+
+
 def endpoint_body_into_openapi(
     endpoint_body: EndpointBody, openapi: OpenAPI, types: dict[Type, str]
 ) -> OpenAPIBody:
@@ -138,6 +157,20 @@ class EndpointOptions(TypedDict):
     responses: NotRequired[EndpointResponses]
     request_body: NotRequired[EndpointBody]
     openapi: NotRequired[OpenAPIRoute]
+    max_body_size: NotRequired[int]
+    max_part_size: NotRequired[int]
+    checksum: NotRequired[str]
+    max_items: NotRequired[int]
+    collect_errors: NotRequired[bool]
+    stream: NotRequired[StreamFormat]
+    include: NotRequired[IncEx]
+    exclude: NotRequired[IncEx]
+    compression: NotRequired[CompressionOptions | Literal[False]]
+    blocking: NotRequired[bool]
+    cache: NotRequired[CacheOptions | bool]
+    coalesce: NotRequired[CoalesceOptions | bool]
+    rate_limit: NotRequired[RateLimitOptions | Literal[False]]
+    metrics: NotRequired[bool]
 
 
 def get_endpoint_options(func) -> EndpointOptions:
@@ -152,6 +185,20 @@ def endpoint(
     responses: EndpointResponses | None = None,
     request_body: EndpointBody | None = None,
     openapi: OpenAPIRoute | None = None,
+    max_body_size: int | None = None,
+    max_part_size: int | None = None,
+    checksum: str | None = None,
+    max_items: int | None = None,
+    collect_errors: bool | None = None,
+    stream: StreamFormat | None = None,
+    include: IncEx | None = None,
+    exclude: IncEx | None = None,
+    compression: CompressionOptions | Literal[False] | None = None,
+    blocking: bool | None = None,
+    cache: CacheOptions | bool | None = None,
+    coalesce: CoalesceOptions | bool | None = None,
+    rate_limit: RateLimitOptions | Literal[False] | None = None,
+    metrics: bool | None = None,
 ):
     def wrapper(func):
         endpoint_options = get_endpoint_options(func)
@@ -163,6 +210,34 @@ def endpoint(
             endpoint_options["request_body"] = request_body
         if openapi is not None:
             endpoint_options["openapi"] = openapi
+        if max_body_size is not None:
+            endpoint_options["max_body_size"] = max_body_size
+        if max_part_size is not None:
+            endpoint_options["max_part_size"] = max_part_size
+        if checksum is not None:
+            endpoint_options["checksum"] = checksum
+        if max_items is not None:
+            endpoint_options["max_items"] = max_items
+        if collect_errors is not None:
+            endpoint_options["collect_errors"] = collect_errors
+        if stream is not None:
+            endpoint_options["stream"] = stream
+        if include is not None:
+            endpoint_options["include"] = include
+        if exclude is not None:
+            endpoint_options["exclude"] = exclude
+        if compression is not None:
+            endpoint_options["compression"] = compression
+        if blocking is not None:
+            endpoint_options["blocking"] = blocking
+        if cache is not None:
+            endpoint_options["cache"] = cache
+        if coalesce is not None:
+            endpoint_options["coalesce"] = coalesce
+        if rate_limit is not None:
+            endpoint_options["rate_limit"] = rate_limit
+        if metrics is not None:
+            endpoint_options["metrics"] = metrics
         return func
 
     return wrapper
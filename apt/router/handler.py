@@ -1,5 +1,26 @@
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator
+from copy import deepcopy
+from functools import lru_cache
+from inspect import (
+    isasyncgen,
+    isasyncgenfunction,
+    isawaitable,
+    isclass,
+    iscoroutinefunction,
+)
+from types import NoneType
 from logging import warning
-from typing import Any, Callable, Coroutine, Type, get_type_hints
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    NamedTuple,
+    Type,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from aiohttp.hdrs import ACCEPT
 from aiohttp.web import (
     get,
     head,
@@ -10,24 +31,146 @@ from aiohttp.web import (
     options,
     Request,
     Response,
+    StreamResponse,
     AbstractRouteDef,
 )
-from result import Ok, Result, is_err
+from result import Result, is_err
 
+from apt.extract.codec import add_codec_content
 from apt.extract.extract import Extract
-from apt.openapi import OpenAPI, OpenAPIRoute, OpenAPIMethod
+from apt.openapi import OpenAPI, OpenAPIRoute, OpenAPIMethod, SchemaTypes
+from apt.response.compression import Compressor
+from apt.response.serialize import ResponseSerializer
+from apt.response.stream import StreamBody, stream_formats
+from apt.router.blocking import default_blocking_executor
+from apt.router.cache import ResponseCache, bypasses_cache
+from apt.router.coalesce import SingleFlight
+from apt.router.limit import RateLimiter, rate_limited, rate_limits_into_openapi
+from apt.router.metrics import RouteMetrics, measured, timed
+from apt.router.profile import profiled
+from apt.router.arguments import (
+    ArgumentsExtractor,
+    HandlerArgument,
+    close_arguments,
+    compile_arguments,
+    extract_request,
+)
 from apt.router.endpoint import (
     EndpointOptions,
     endpoint_body_into_openapi,
+    endpoint_body_type,
     get_endpoint_options,
 )
+from apt.router.options import RouterOptions
+
+
+def error_response(error: Any) -> Response:
+    if isinstance(error, Response):
+        return error
+    return Response(status=500, text=str(error))
+
+
+async def respond(
+    request: Request,
+    value: Any,
+    stream: type[StreamBody],
+    serialize: ResponseSerializer,
+    compressor: Compressor | None = None,
+) -> StreamResponse:
+    if isinstance(value, StreamBody):
+        return await value.into_response(request, compressor)
+    elif isasyncgen(value):
+        return await stream(value).into_response(request, compressor)
+    response = (
+        value
+        if isinstance(value, StreamResponse)
+        else serialize(value, request.headers.get(ACCEPT))
+    )
+    if compressor is not None:
+        return await compressor.compress(request, response)
+    return response
+
+
+@lru_cache(maxsize=None)
+def handler_type_hints(handler: Callable[..., Any]) -> dict[str, Any]:
+    return get_type_hints(handler)
+
+
+def stream_call(
+    handler: Callable[..., AsyncIterator[Any]], stream: type[StreamBody]
+) -> Callable[..., Coroutine[Any, Any, StreamBody]]:
+    async def call(**kwargs: Any) -> StreamBody:
+        return stream(handler(**kwargs))
+
+    return call
+
+
+def inline_call(
+    handler: Callable[..., Any],
+) -> Callable[..., Coroutine[Any, Any, Any]]:
+    async def call(**kwargs: Any) -> Any:
+        value = handler(**kwargs)
+        if isawaitable(value):
+            return await value
+        return value
+
+    return call
+
+
+def stream_return_type(
+    handler: Callable[..., Any], stream: type[StreamBody]
+) -> tuple[type[StreamBody], Type] | None:
+    return_type = handler_type_hints(handler).get("return")
+    return_origin = get_origin(return_type)
+    if isclass(return_origin) and issubclass(return_origin, StreamBody):
+        return return_origin, get_args(return_type)[0]
+    elif return_origin in (AsyncGenerator, AsyncIterator, AsyncIterable):
+        return stream, get_args(return_type)[0]
+    return None
+
+
+def serialized_return_type(handler: Callable[..., Any]) -> Type | None:
+    return_type = handler_type_hints(handler).get("return")
+    return_cls = get_origin(return_type) or return_type
+    if return_type is None or return_type is NoneType or return_type is Any:
+        return None
+    elif isclass(return_cls) and issubclass(
+        return_cls,
+        (StreamResponse, StreamBody, AsyncGenerator, AsyncIterator, AsyncIterable),
+    ):
+        return None
+    return return_type
+
+
+class HandlerPlan(NamedTuple):
+    path_pattern: str
+    method: OpenAPIMethod
+    arguments: tuple[HandlerArgument, ...]
+    extract: ArgumentsExtractor
+    call: Callable[..., Coroutine[Any, Any, Any]]
+    stream: type[StreamBody]
+    serialize: ResponseSerializer
+    blocking: bool
+    cleanup: tuple[str, ...]
 
 
 class Handler:
-    handler: Callable[..., Coroutine[Any, Any, Response]]
+    handler: Callable[..., Any]
+    plans: dict[str | None, HandlerPlan]
+    compressors: dict[str | None, Compressor]
+    caches: dict[str | None, ResponseCache]
+    flights: dict[str | None, SingleFlight]
+    limiters: dict[str | None, RateLimiter]
+    fragments: dict[str | None, tuple[dict[Type, str], OpenAPIRoute]]
 
-    def __init__(self, handler: Callable[..., Coroutine[Any, Any, Response]]):
+    def __init__(self, handler: Callable[..., Any]):
         self.handler = handler
+        self.plans = {}
+        self.compressors = {}
+        self.caches = {}
+        self.flights = {}
+        self.limiters = {}
+        self.fragments = {}
 
     def get_endpoint_options(self) -> EndpointOptions:
         return get_endpoint_options(self.handler)
@@ -40,83 +183,346 @@ class Handler:
     def get_method(self) -> OpenAPIMethod:
         return self.get_endpoint_options()["method"]
 
-    async def arguments(
-        self, request: Request, prefix: str | None = None
-    ) -> Result[dict[str, Any], Response]:
-        args: dict[str, Any] = {}
+    def get_stream(self) -> type[StreamBody]:
+        return stream_formats[self.get_endpoint_options().get("stream", "ndjson")]
+
+    def is_blocking(self) -> bool:
+        is_async = iscoroutinefunction(self.handler) or isasyncgenfunction(self.handler)
+        blocking = self.get_endpoint_options().get("blocking", not is_async)
+        if blocking and is_async:
+            name = self.handler.__qualname__
+            raise TypeError(f"Async handler {name} cannot be marked blocking")
+        return blocking
+
+    def get_call(
+        self, plan: HandlerPlan, router_options: RouterOptions | None = None
+    ) -> Callable[..., Coroutine[Any, Any, Any]]:
+        if not plan.blocking:
+            return plan.call
+        executor = (router_options or {}).get("blocking")
+        if executor is None:
+            executor = default_blocking_executor()
+        return executor.wrap(plan.call)
+
+    def get_compressor(
+        self, prefix: str | None = None, router_options: RouterOptions | None = None
+    ) -> Compressor | None:
+        compression = self.get_endpoint_options().get(
+            "compression", router_options.get("compression") if router_options else None
+        )
+        if compression is None or compression is False:
+            return None
+        compressor = self.compressors.get(prefix)
+        if compressor is None:
+            compressor = Compressor(compression)
+            self.compressors[prefix] = compressor
+        return compressor
+
+    def get_cache(self, prefix: str | None = None) -> ResponseCache | None:
+        cache_options = self.get_endpoint_options().get("cache")
+        if not cache_options:
+            return None
+        cache = self.caches.get(prefix)
+        if cache is None:
+            cache = ResponseCache(None if cache_options is True else cache_options)
+            self.caches[prefix] = cache
+        return cache
+
+    def get_flight(self, prefix: str | None = None) -> SingleFlight | None:
+        coalesce_options = self.get_endpoint_options().get("coalesce")
+        if not coalesce_options:
+            return None
+        plan = self.compile(prefix)
+        if plan.method not in ("get", "head") or any(
+            argument.reads_body for argument in plan.arguments
+        ):
+            name = self.handler.__qualname__
+            raise ValueError(f"Cannot coalesce {name}: not a GET/HEAD without a body")
+        flight = self.flights.get(prefix)
+        if flight is None:
+            flight = SingleFlight(
+                None if coalesce_options is True else coalesce_options
+            )
+            self.flights[prefix] = flight
+        return flight
+
+    def get_rate_limiters(
+        self, prefix: str | None = None, router_options: RouterOptions | None = None
+    ) -> list[RateLimiter]:
+        rate_limit = self.get_endpoint_options().get("rate_limit")
+        if rate_limit is False:
+            return []
+        limiters = list((router_options or {}).get("rate_limit", ()))
+        if rate_limit is not None:
+            limiter = self.limiters.get(prefix)
+            if limiter is None:
+                limiter = RateLimiter(rate_limit)
+                self.limiters[prefix] = limiter
+            limiters.append(limiter)
+        return limiters
+
+    def get_metrics(
+        self, plan: HandlerPlan, router_options: RouterOptions | None = None
+    ) -> RouteMetrics | None:
+        registry = (router_options or {}).get("metrics")
+        if registry is None or not self.get_endpoint_options().get("metrics", True):
+            return None
+        return registry.route(plan.method, plan.path_pattern)
+
+    def get_serializer(self) -> ResponseSerializer:
+        endpoint_options = self.get_endpoint_options()
+        return_type = serialized_return_type(self.handler)
+        responses = endpoint_options.get("responses", {})
+        empty_status = 204
+        declared: tuple[int, tuple[str, Type]] | None = None
+        matched: tuple[int, tuple[str, Type]] | None = None
+        for status in sorted(responses, reverse=True):
+            if not 200 <= status < 300:
+                continue
+            body_type = endpoint_body_type(responses[status])
+            if body_type is None:
+                if responses[status] is None:
+                    empty_status = status
+            elif return_type is not None and body_type[1] == return_type:
+                matched = (status, body_type)
+            else:
+                declared = (status, body_type)
+        status, (content_type, response_type) = (
+            matched or declared or (200, ("application/json", return_type))
+        )
+        return ResponseSerializer(
+            status,
+            content_type,
+            response_type,
+            endpoint_options.get("include"),
+            endpoint_options.get("exclude"),
+            empty_status,
+        )
+
+    def compile(self, prefix: str | None = None) -> HandlerPlan:
+        plan = self.plans.get(prefix)
+        if plan is not None:
+            return plan
         path_pattern = self.get_path(prefix)
-        for key, cls in get_type_hints(self.handler).items():
-            if Extract.is_extractor(cls):
-                value = await cls.extract(
-                    cls, request=request, path_pattern=path_pattern
-                )
-                if is_err(value):
-                    return value
-                args[key] = value.ok()
-            elif key == "return":
+        endpoint_options = self.get_endpoint_options()
+        arguments: list[HandlerArgument] = []
+        for key, cls in handler_type_hints(self.handler).items():
+            if key == "return":
                 continue
+            elif Extract.is_extractor(cls):
+                compile = getattr(cls, "compile", Extract.compile)
+                extract = compile(
+                    cls,
+                    name=key,
+                    path_pattern=path_pattern,
+                    max_body_size=endpoint_options.get("max_body_size"),
+                    max_part_size=endpoint_options.get("max_part_size"),
+                    checksum=endpoint_options.get("checksum"),
+                    max_items=endpoint_options.get("max_items"),
+                    collect_errors=endpoint_options.get("collect_errors"),
+                )
+                arguments.append(
+                    HandlerArgument(
+                        key,
+                        cls,
+                        get_args(cls),
+                        extract,
+                        len(arguments),
+                        getattr(cls, "reads_body", False),
+                        getattr(cls, "is_cheap", False),
+                        getattr(cls, "is_concurrent", False),
+                        getattr(cls, "needs_close", False),
+                    )
+                )
             elif key == "request":
-                args[key] = request
+                arguments.append(
+                    HandlerArgument(
+                        key,
+                        cls,
+                        (),
+                        extract_request,
+                        len(arguments),
+                        False,
+                        True,
+                        False,
+                        False,
+                    )
+                )
             else:
-                print(f"Unknown type: {cls}")
-        return Ok(args)
+                name = self.handler.__qualname__
+                raise TypeError(f"Unknown type for argument {key} of {name}: {cls}")
+        stream = self.get_stream()
+        blocking = self.is_blocking()
+        call: Callable[..., Coroutine[Any, Any, Any]] = self.handler
+        if isasyncgenfunction(self.handler):
+            call = stream_call(self.handler, stream)
+        elif not blocking and not iscoroutinefunction(self.handler):
+            call = inline_call(self.handler)
+        plan = HandlerPlan(
+            path_pattern,
+            self.get_method(),
+            tuple(arguments),
+            compile_arguments(tuple(arguments)),
+            call,
+            stream,
+            self.get_serializer(),
+            blocking,
+            tuple(argument.name for argument in arguments if argument.needs_close),
+        )
+        self.plans[prefix] = plan
+        return plan
 
-    async def handle(self, request: Request, prefix: str | None = None) -> Response:
-        result = await self.arguments(request, prefix)
+    async def arguments(
+        self, request: Request, prefix: str | None = None
+    ) -> Result[dict[str, Any], Response]:
+        return await self.compile(prefix).extract(request)
+
+    async def handle(
+        self, request: Request, prefix: str | None = None
+    ) -> StreamResponse:
+        plan = self.compile(prefix)
+        result = await plan.extract(request)
         if is_err(result):
-            error = result.err()
-            if isinstance(error, Response):
-                return error
-            return Response(status=500, text=str(error))
-        else:
-            args = result.ok()
-            return await self.handler(**args)
+            return error_response(result.err())
+        kwargs = result.ok()
+        try:
+            value = await self.get_call(plan)(**kwargs)
+            return await respond(request, value, plan.stream, plan.serialize)
+        finally:
+            close_arguments(kwargs, plan.cleanup)
+
+    def compile_route(
+        self, prefix: str | None = None, router_options: RouterOptions | None = None
+    ) -> tuple[HandlerPlan, Callable[[Request], Coroutine[Any, Any, StreamResponse]]]:
+        plan = self.compile(prefix)
+        metrics = self.get_metrics(plan, router_options)
+        handle = self.compile_handle(plan, prefix, router_options, metrics)
+        profiler = (router_options or {}).get("profiler")
+        if profiler is not None:
+            route = profiler.route(plan.method, plan.path_pattern)
+            handle = profiled(handle, profiler, route)
+        limiters = self.get_rate_limiters(prefix, router_options)
+        if limiters:
+            handle = rate_limited(handle, limiters)
+        if metrics is not None:
+            handle = measured(handle, metrics)
+        return plan, handle
 
     def into_handle(
-        self, prefix: str | None = None
-    ) -> Callable[[Request], Coroutine[Any, Any, Response]]:
-        async def handle(request: Request) -> Response:
-            return await self.handle(request, prefix)
+        self, prefix: str | None = None, router_options: RouterOptions | None = None
+    ) -> Callable[[Request], Coroutine[Any, Any, StreamResponse]]:
+        return self.compile_route(prefix, router_options)[1]
 
-        return handle
+    def compile_handle(
+        self,
+        plan: HandlerPlan,
+        prefix: str | None = None,
+        router_options: RouterOptions | None = None,
+        metrics: RouteMetrics | None = None,
+    ) -> Callable[[Request], Coroutine[Any, Any, StreamResponse]]:
+        extract = plan.extract
+        call = self.get_call(plan, router_options)
+        send = respond
+        stream = plan.stream
+        serialize = plan.serialize
+        cleanup = plan.cleanup
+        compressor = self.get_compressor(prefix, router_options)
+        cache = self.get_cache(prefix)
+        flight = self.get_flight(prefix)
+        if metrics is not None:
+            extract = timed(extract, metrics.extract)
+            call = timed(call, metrics.handle)
+            send = timed(respond, metrics.serialize)
 
-    def into_route(self, prefix: str | None = None) -> AbstractRouteDef:
-        method = self.get_method()
-        match method:
+        async def handle(request: Request) -> StreamResponse:
+            args = await extract(request)
+            if is_err(args):
+                return error_response(args.err())
+            kwargs = args.ok()
+            try:
+                value = await call(**kwargs)
+                return await send(request, value, stream, serialize, compressor)
+            finally:
+                close_arguments(kwargs, cleanup)
+
+        if cache is None and flight is None:
+            return handle
+
+        async def produce(request: Request, kwargs: dict[str, Any]) -> StreamResponse:
+            value = await call(**kwargs)
+            return await send(request, value, stream, serialize)
+
+        if flight is not None:
+            produce = flight.wrap(produce)
+
+        async def handle_shared(request: Request) -> StreamResponse:
+            args = await extract(request)
+            if is_err(args):
+                return error_response(args.err())
+            kwargs = args.ok()
+            try:
+                if cache is None:
+                    response = await produce(request, kwargs)
+                else:
+                    key = cache.key(kwargs)
+                    codec = serialize.negotiate(request.headers.get(ACCEPT))
+                    if codec is not None:
+                        key = (codec.content_type, key)
+                    if compressor is not None:
+                        key = (compressor.negotiate(request), key)
+                    response = None if bypasses_cache(request) else cache.get(key)
+                    if response is not None:
+                        return response
+                    response = await produce(request, kwargs)
+                    if compressor is not None:
+                        response = await compressor.compress(request, response)
+                        compressor.vary(response)
+                    cache.store(key, response, kwargs)
+                    return response
+            finally:
+                close_arguments(kwargs, cleanup)
+            if compressor is not None:
+                return await compressor.compress(request, response)
+            return response
+
+        return handle_shared
+
+    def into_route(
+        self, prefix: str | None = None, router_options: RouterOptions | None = None
+    ) -> AbstractRouteDef:
+        plan, handle = self.compile_route(prefix, router_options)
+        path_pattern = plan.path_pattern
+        match plan.method:
             case "get":
-                return get(self.get_path(prefix), self.into_handle(prefix))
+                return get(path_pattern, handle)
             case "post":
-                return post(self.get_path(prefix), self.into_handle(prefix))
+                return post(path_pattern, handle)
             case "delete":
-                return delete(self.get_path(prefix), self.into_handle(prefix))
+                return delete(path_pattern, handle)
             case "put":
-                return put(self.get_path(prefix), self.into_handle(prefix))
+                return put(path_pattern, handle)
             case "patch":
-                return patch(self.get_path(prefix), self.into_handle(prefix))
+                return patch(path_pattern, handle)
             case "head":
-                return head(self.get_path(prefix), self.into_handle(prefix))
+                return head(path_pattern, handle)
             case "options":
-                return options(self.get_path(prefix), self.into_handle(prefix))
-        warning(f"Unknown method: {method}")
-        return get(self.get_path(prefix), self.into_handle(prefix))
+                return options(path_pattern, handle)
+        warning(f"Unknown method: {plan.method}")
+        return get(path_pattern, handle)
 
-    def into_openapi(
+    def openapi_fragment(
         self,
         openapi: OpenAPI,
-        types: dict[Type, str] | None = None,
+        types: dict[Type, str],
         prefix: str | None = None,
-    ) -> OpenAPI:
-        if types is None:
-            types = {}
+        router_options: RouterOptions | None = None,
+    ) -> OpenAPIRoute:
+        fragment = self.fragments.get(prefix)
+        if fragment is not None and fragment[0] is types:
+            return fragment[1]
         path_pattern = self.get_path(prefix)
-        method = self.get_method()
         endpoint_options = self.get_endpoint_options()
-        openapi_route: OpenAPIRoute
-        if "openapi" not in endpoint_options:
-            openapi_route = {}
-            endpoint_options["openapi"] = openapi_route
-        else:
-            openapi_route = endpoint_options["openapi"]
+        openapi_route: OpenAPIRoute = deepcopy(endpoint_options.get("openapi", {}))
         request_body = endpoint_options.get("request_body")
         if request_body is not None:
             openapi_route["requestBody"] = endpoint_body_into_openapi(
@@ -131,7 +537,40 @@ class Handler:
                     response, openapi, types
                 )
 
-        for name, value in get_type_hints(self.handler).items():
+        stream_return = stream_return_type(self.handler, self.get_stream())
+        if stream_return is not None and 200 not in (responses or {}):
+            stream, item_type = stream_return
+            if "responses" not in openapi_route:
+                openapi_route["responses"] = {}
+            openapi_route["responses"][200] = stream.into_openapi(
+                item_type, openapi, types
+            )
+
+        return_type = serialized_return_type(self.handler)
+        if return_type is not None and not any(
+            200 <= status < 300 for status in (responses or {})
+        ):
+            if "responses" not in openapi_route:
+                openapi_route["responses"] = {}
+            openapi_route["responses"][200] = endpoint_body_into_openapi(
+                ("application/json", return_type), openapi, types
+            )
+
+        if return_type is not None:
+            status = self.get_serializer().status
+            response = openapi_route.get("responses", {}).get(status)
+            if response is not None and "content" in response:
+                content = dict(response["content"])
+                add_codec_content(content, response=True)
+                openapi_route["responses"][status] = {**response, "content": content}
+
+        limiters = self.get_rate_limiters(prefix, router_options)
+        if limiters:
+            if "responses" not in openapi_route:
+                openapi_route["responses"] = {}
+            openapi_route["responses"][429] = rate_limits_into_openapi(limiters)
+
+        for name, value in handler_type_hints(self.handler).items():
             if Extract.is_extractor(value):
                 value.into_openapi(
                     value,
@@ -142,15 +581,32 @@ class Handler:
                     path_pattern=path_pattern,
                 )
 
+        self.fragments[prefix] = (types, openapi_route)
+        return openapi_route
+
+    def into_openapi(
+        self,
+        openapi: OpenAPI,
+        types: dict[Type, str] | None = None,
+        prefix: str | None = None,
+        router_options: RouterOptions | None = None,
+    ) -> OpenAPI:
+        if types is None:
+            types = SchemaTypes()
+        path_pattern = self.get_path(prefix)
+        method = self.get_method()
+        openapi_route = self.openapi_fragment(openapi, types, prefix, router_options)
+
         if "paths" not in openapi:
             openapi["paths"] = {}
 
         if path_pattern not in openapi["paths"]:
             openapi["paths"][path_pattern] = {}
 
-        if method not in openapi["paths"][path_pattern]:
-            openapi["paths"][path_pattern][method] = openapi_route
-        else:
-            openapi["paths"][path_pattern][method].update(openapi_route)
+        path = openapi["paths"][path_pattern]
+        if method not in path:
+            path[method] = openapi_route
+        elif path[method] is not openapi_route:
+            path[method].update(openapi_route)
 
         return openapi
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from math import ceil
+from time import monotonic
+from typing import Any, Callable, Coroutine, Hashable, Literal, NotRequired, TypedDict
+from aiohttp.hdrs import RETRY_AFTER, X_FORWARDED_FOR
+from aiohttp.web import Request, Response, StreamResponse
+
+from apt.openapi.spec import OpenAPIBody
+
+type RateLimitKey = Literal["ip", "api_key", "global"] | Callable[[Request], Hashable]
+
+
+class RateLimitOptions(TypedDict):
+    rate: float
+    burst: NotRequired[int]
+    key: NotRequired[RateLimitKey]
+    header: NotRequired[str]
+    trust_forwarded: NotRequired[bool]
+    max_clients: NotRequired[int]
+
+
+class RateLimitStats:
+    allowed: int
+    limited: int
+    evicted: int
+
+    def __init__(self):
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+
+class RateLimiter:
+    rate: float
+    burst: int
+    key: RateLimitKey
+    header: str
+    trust_forwarded: bool
+    max_clients: int
+    buckets: OrderedDict[Hashable, list[float]]
+    stats: RateLimitStats
+
+    def __init__(self, options: RateLimitOptions):
+        self.rate = options["rate"]
+        if self.rate <= 0:
+            raise ValueError(f"Rate limit rate must be positive, got {self.rate}")
+        self.burst = options.get("burst", max(1, ceil(self.rate)))
+        if self.burst < 1:
+            raise ValueError(f"Rate limit burst must be at least 1, got {self.burst}")
+        self.key = options.get("key", "ip")
+        self.header = options.get("header", "X-API-Key")
+        self.trust_forwarded = options.get("trust_forwarded", False)
+        self.max_clients = options.get("max_clients", 10000)
+        self.buckets = OrderedDict()
+        self.stats = RateLimitStats()
+
+    def client_key(self, request: Request) -> Hashable:
+        if callable(self.key):
+            return self.key(request)
+        elif self.key == "global":
+            return None
+        elif self.key == "api_key":
+            api_key = request.headers.get(self.header)
+            if api_key is not None:
+                return api_key
+        if self.trust_forwarded:
+            forwarded = request.headers.get(X_FORWARDED_FOR)
+            if forwarded:
+                return forwarded.split(",", 1)[0].strip()
+        return request.remote
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        now = monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+                self.stats.evicted += 1
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            self.stats.allowed += 1
+            return 0.0
+        self.stats.limited += 1
+        return (cost - bucket[0]) / self.rate
+
+    def check(self, request: Request) -> Response | None:
+        retry_after = self.acquire(self.client_key(request))
+        if retry_after <= 0:
+            return None
+        return Response(
+            status=429,
+            text="Too Many Requests",
+            headers={RETRY_AFTER: str(max(1, ceil(retry_after)))},
+        )
+
+    def describe(self) -> str:
+        key = self.key if isinstance(self.key, str) else "custom key"
+        return f"{self.rate:g} requests per second per {key}, burst {self.burst}"
+
+
+def rate_limited(
+    handle: Callable[[Request], Coroutine[Any, Any, StreamResponse]],
+    limiters: list[RateLimiter],
+) -> Callable[[Request], Coroutine[Any, Any, StreamResponse]]:
+    async def limited(request: Request) -> StreamResponse:
+        for limiter in limiters:
+            response = limiter.check(request)
+            if response is not None:
+                return response
+        return await handle(request)
+
+    return limited
+
+
+def rate_limits_into_openapi(limiters: list[RateLimiter]) -> OpenAPIBody:
+    return {
+        "description": "Too Many Requests: "
+        + "; ".join(limiter.describe() for limiter in limiters),
+        "headers": {
+            RETRY_AFTER: {
+                "description": "Seconds to wait before retrying",
+                "schema": {"type": "integer"},
+            }
+        },
+        "content": {"text/plain": {"schema": {"type": "string"}}},
+    }
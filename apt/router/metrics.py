@@ -0,0 +1,238 @@
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Coroutine
+from aiohttp.web import HTTPException, Request, Response, StreamResponse
+
+from apt.router.endpoint import endpoint
+
+type Handle = Callable[[Request], Coroutine[Any, Any, StreamResponse]]
+
+latency_buckets = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+size_buckets = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+prometheus_content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int]
+    sum: float
+    count: int
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        total = 0
+        counts = []
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class RouteMetrics:
+    method: str
+    route: str
+    duration: Histogram
+    extract: Histogram
+    handle: Histogram
+    serialize: Histogram
+    request_size: Histogram
+    response_size: Histogram
+    statuses: dict[int, int]
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.duration = Histogram(latency_buckets)
+        self.extract = Histogram(latency_buckets)
+        self.handle = Histogram(latency_buckets)
+        self.serialize = Histogram(latency_buckets)
+        self.request_size = Histogram(size_buckets)
+        self.response_size = Histogram(size_buckets)
+        self.statuses = {}
+
+    def record(self, request: Request, status: int, size: int, duration: float):
+        self.duration.observe(duration)
+        self.request_size.observe(request.content_length or 0)
+        self.response_size.observe(size)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+def timed(
+    func: Callable[..., Coroutine[Any, Any, Any]], histogram: Histogram
+) -> Callable[..., Coroutine[Any, Any, Any]]:
+    async def measured(*args: Any, **kwargs: Any) -> Any:
+        start = perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            histogram.observe(perf_counter() - start)
+
+    return measured
+
+
+def response_size(response: StreamResponse) -> int:
+    if isinstance(response, Response) and isinstance(response.body, bytes):
+        return len(response.body)
+    return response.body_length
+
+
+def measured(handle: Handle, metrics: RouteMetrics) -> Handle:
+    async def measure(request: Request) -> StreamResponse:
+        start = perf_counter()
+        try:
+            response = await handle(request)
+        except HTTPException as e:
+            metrics.record(request, e.status, 0, perf_counter() - start)
+            raise
+        except Exception:
+            metrics.record(request, 500, 0, perf_counter() - start)
+            raise
+        metrics.record(
+            request, response.status, response_size(response), perf_counter() - start
+        )
+        return response
+
+    return measure
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    namespace: str
+    routes: dict[tuple[str, str], RouteMetrics]
+
+    def __init__(self, namespace: str = "apt"):
+        self.namespace = namespace
+        self.routes = {}
+
+    def route(self, method: str, route: str) -> RouteMetrics:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = RouteMetrics(method, route)
+            self.routes[(method, route)] = metrics
+        return metrics
+
+    def histogram_lines(
+        self,
+        name: str,
+        help: str,
+        histogram: Callable[[RouteMetrics], Histogram],
+    ) -> list[str]:
+        name = f"{self.namespace}_{name}"
+        lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+        for metrics in self.routes.values():
+            labels = (
+                f'method="{escape_label(metrics.method)}",'
+                f'route="{escape_label(metrics.route)}"'
+            )
+            values = histogram(metrics)
+            counts = values.cumulative()
+            for bucket, count in zip((*values.buckets, float("inf")), counts):
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{format_value(bucket)}"}} {count}'
+                )
+            lines.append(f"{name}_sum{{{labels}}} {format_value(values.sum)}")
+            lines.append(f"{name}_count{{{labels}}} {values.count}")
+        return lines
+
+    def into_prometheus(self) -> str:
+        name = f"{self.namespace}_responses_total"
+        lines = [
+            f"# HELP {name} Responses by route and status code.",
+            f"# TYPE {name} counter",
+        ]
+        for metrics in self.routes.values():
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(
+                    f'{name}{{method="{escape_label(metrics.method)}",'
+                    f'route="{escape_label(metrics.route)}",'
+                    f'status="{status}"}} {count}'
+                )
+        lines += self.histogram_lines(
+            "request_duration_seconds",
+            "Total request latency.",
+            lambda metrics: metrics.duration,
+        )
+        lines += self.histogram_lines(
+            "extract_duration_seconds",
+            "Time spent extracting handler arguments.",
+            lambda metrics: metrics.extract,
+        )
+        lines += self.histogram_lines(
+            "handler_duration_seconds",
+            "Time spent in the handler.",
+            lambda metrics: metrics.handle,
+        )
+        lines += self.histogram_lines(
+            "serialize_duration_seconds",
+            "Time spent serialising and writing the response.",
+            lambda metrics: metrics.serialize,
+        )
+        lines += self.histogram_lines(
+            "request_size_bytes",
+            "Request body size.",
+            lambda metrics: metrics.request_size,
+        )
+        lines += self.histogram_lines(
+            "response_size_bytes",
+            "Response body size.",
+            lambda metrics: metrics.response_size,
+        )
+        return "\n".join(lines) + "\n"
+
+
+default_registry = MetricsRegistry()
+
+
+def metrics_endpoint(
+    registry: MetricsRegistry | None = None, path: str = "/metrics"
+) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+    if registry is None:
+        registry = default_registry
+
+    @endpoint(
+        path=path,
+        method="GET",
+        responses={200: ("text/plain", str)},
+        metrics=False,
+    )
+    async def metrics(request: Request) -> Response:
+        return Response(
+            body=registry.into_prometheus().encode(),
+            headers={"Content-Type": prometheus_content_type},
+        )
+
+    return metrics
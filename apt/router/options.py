@@ -0,0 +1,28 @@
+from typing import Literal, NotRequired, TypedDict
+
+from apt.response.compression import CompressionOptions
+from apt.router.blocking import BlockingExecutor
+from apt.router.limit import RateLimiter
+from apt.router.metrics import MetricsRegistry
+from apt.router.profile import Profiler
+
+
+class RouterOptions(TypedDict):
+    compression: NotRequired[CompressionOptions | Literal[False]]
+    blocking: NotRequired[BlockingExecutor]
+    rate_limit: NotRequired[tuple[RateLimiter, ...]]
+    metrics: NotRequired[MetricsRegistry]
+    profiler: NotRequired[Profiler]
+
+
+def merge_router_options(
+    parent: RouterOptions | None, child: RouterOptions
+) -> RouterOptions:
+    if parent is None:
+        return child
+    options = RouterOptions(**{**parent, **child})
+    if "rate_limit" in parent and "rate_limit" in child:
+        options["rate_limit"] = tuple(
+            dict.fromkeys((*parent["rate_limit"], *child["rate_limit"]))
+        )
+    return options
@@ -0,0 +1,219 @@
+import marshal
+from cProfile import Profile
+from heapq import heappush, heappushpop
+from itertools import count
+from random import random
+from time import perf_counter, time
+from typing import Any, Callable, Coroutine, Literal, NamedTuple
+from aiohttp.web import Request, StreamResponse
+from pydantic import BaseModel
+
+type Handle = Callable[[Request], Coroutine[Any, Any, StreamResponse]]
+type FunctionKey = tuple[str, int, str]
+
+
+class ProfileSettings(BaseModel):
+    method: str | None = None
+    route: str | None = None
+    sample_rate: float = 1.0
+    threshold: float = 0.0
+    keep: int = 10
+
+
+class ProfileFormat(BaseModel):
+    format: Literal["pstats", "collapsed"] = "pstats"
+
+
+class CapturedProfile(NamedTuple):
+    id: int
+    method: str
+    route: str
+    path: str
+    status: int
+    duration: float
+    timestamp: float
+    stats: dict[FunctionKey, Any]
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "duration": self.duration,
+            "timestamp": self.timestamp,
+        }
+
+    def into_pstats(self) -> bytes:
+        return marshal.dumps(self.stats)
+
+    def into_collapsed(self) -> str:
+        def label(function: FunctionKey) -> str:
+            filename, line, name = function
+            return f"{name} ({filename}:{line})".replace(";", ":")
+
+        def stack(function: FunctionKey) -> list[str]:
+            frames = [label(function)]
+            seen = {function}
+            while True:
+                callers = self.stats[function][4]
+                if not callers:
+                    return frames[::-1]
+                function = max(callers, key=lambda caller: callers[caller][3])
+                if function in seen or function not in self.stats:
+                    return frames[::-1]
+                seen.add(function)
+                frames.append(label(function))
+
+        lines = []
+        for function, (_cc, _nc, tottime, _cumtime, _callers) in self.stats.items():
+            microseconds = int(tottime * 1_000_000)
+            if microseconds > 0:
+                lines.append(f"{';'.join(stack(function))} {microseconds}")
+        return "\n".join(lines) + "\n"
+
+
+class RouteProfiler:
+    method: str
+    route: str
+    enabled: bool
+    sample_rate: float
+    threshold: float
+    keep: int
+    profiles: list[tuple[float, int, CapturedProfile]]
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.threshold = 0.0
+        self.keep = 10
+        self.profiles = []
+
+    def configure(self, settings: ProfileSettings, enabled: bool):
+        self.enabled = enabled
+        self.sample_rate = settings.sample_rate
+        self.threshold = settings.threshold
+        if settings.keep != self.keep:
+            self.keep = settings.keep
+            self.profiles = sorted(self.profiles)[-self.keep :] if self.keep else []
+
+    def capture(self, profile: CapturedProfile):
+        entry = (profile.duration, profile.id, profile)
+        if len(self.profiles) < self.keep:
+            heappush(self.profiles, entry)
+        elif self.keep:
+            heappushpop(self.profiles, entry)
+
+    def worst(self) -> list[CapturedProfile]:
+        return [profile for _, _, profile in sorted(self.profiles, reverse=True)]
+
+
+class Profiler:
+    routes: dict[tuple[str, str], RouteProfiler]
+    defaults: ProfileSettings | None
+    active: bool
+    ids: count
+
+    def __init__(self):
+        self.routes = {}
+        self.defaults = None
+        self.active = False
+        self.ids = count(1)
+
+    def route(self, method: str, route: str) -> RouteProfiler:
+        profiler = self.routes.get((method, route))
+        if profiler is None:
+            profiler = RouteProfiler(method, route)
+            if self.defaults is not None:
+                profiler.configure(self.defaults, True)
+            self.routes[(method, route)] = profiler
+        return profiler
+
+    def matches(self, profiler: RouteProfiler, settings: ProfileSettings) -> bool:
+        return (settings.method is None or settings.method == profiler.method) and (
+            settings.route is None or settings.route == profiler.route
+        )
+
+    def enable(self, settings: ProfileSettings | None = None):
+        if settings is None:
+            settings = ProfileSettings()
+        if settings.method is None and settings.route is None:
+            self.defaults = settings
+        for profiler in self.routes.values():
+            if self.matches(profiler, settings):
+                profiler.configure(settings, True)
+
+    def disable(self, settings: ProfileSettings | None = None):
+        if settings is None:
+            settings = ProfileSettings()
+        if settings.method is None and settings.route is None:
+            self.defaults = None
+        for profiler in self.routes.values():
+            if self.matches(profiler, settings):
+                profiler.enabled = False
+
+    def get(self, id: int) -> CapturedProfile | None:
+        for profiler in self.routes.values():
+            for _, profile_id, profile in profiler.profiles:
+                if profile_id == id:
+                    return profile
+        return None
+
+    def summary(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "method": profiler.method,
+                "route": profiler.route,
+                "enabled": profiler.enabled,
+                "sample_rate": profiler.sample_rate,
+                "threshold": profiler.threshold,
+                "keep": profiler.keep,
+                "profiles": [profile.summary() for profile in profiler.worst()],
+            }
+            for profiler in self.routes.values()
+        ]
+
+
+def profiled(handle: Handle, profiler: Profiler, route: RouteProfiler) -> Handle:
+    async def profile_request(request: Request) -> StreamResponse:
+        if (
+            not route.enabled
+            or profiler.active
+            or (route.sample_rate < 1.0 and random() >= route.sample_rate)
+        ):
+            return await handle(request)
+        profiler.active = True
+        profile = Profile()
+        start = perf_counter()
+        status = 500
+        profile.enable()
+        try:
+            response = await handle(request)
+            status = response.status
+            return response
+        finally:
+            profile.disable()
+            profiler.active = False
+            duration = perf_counter() - start
+            if duration >= route.threshold:
+                profile.create_stats()
+                route.capture(
+                    CapturedProfile(
+                        next(profiler.ids),
+                        route.method,
+                        route.route,
+                        request.path,
+                        status,
+                        duration,
+                        time(),
+                        profile.stats,
+                    )
+                )
+
+    return profile_request
+
+
+default_profiler = Profiler()
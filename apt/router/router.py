@@ -1,20 +1,60 @@
-from typing import Any, Callable, Coroutine, Iterable, Type, Union
+from typing import Any, Callable, Coroutine, Iterable, Literal, Type, Union
 from aiohttp.web import Response, AbstractRouteDef
 
+from apt.openapi.schema import SchemaTypes
 from apt.openapi.spec import OpenAPI
+from apt.response.compression import CompressionOptions
+from apt.router.blocking import BlockingExecutor, BlockingOptions
+from apt.router.dispatch import Dispatcher
 from apt.router.handler import Handler
+from apt.router.limit import RateLimiter, RateLimitOptions
+from apt.router.metrics import MetricsRegistry, default_registry
+from apt.router.options import RouterOptions, merge_router_options
+from apt.router.profile import Profiler, default_profiler
 
 
 class Router:
     prefix: str
     children: list[Union[Handler, "Router"]]
+    revision: int
+    options: RouterOptions
+    openapi_types: tuple[OpenAPI, dict[Type, str]] | None
 
-    def __init__(self, prefix: str | None = None):
+    def __init__(
+        self,
+        prefix: str | None = None,
+        compression: CompressionOptions | Literal[False] | None = None,
+        blocking: BlockingExecutor | BlockingOptions | None = None,
+        rate_limit: RateLimiter | RateLimitOptions | None = None,
+        metrics: MetricsRegistry | bool | None = None,
+        profiler: Profiler | bool | None = None,
+    ):
         if prefix is not None:
             self.prefix = prefix
         else:
             self.prefix = ""
         self.children = []
+        self.revision = 0
+        self.options = RouterOptions()
+        self.openapi_types = None
+        if compression is not None:
+            self.options["compression"] = compression
+        if isinstance(blocking, BlockingExecutor):
+            self.options["blocking"] = blocking
+        elif blocking is not None:
+            self.options["blocking"] = BlockingExecutor(blocking)
+        if isinstance(rate_limit, RateLimiter):
+            self.options["rate_limit"] = (rate_limit,)
+        elif rate_limit is not None:
+            self.options["rate_limit"] = (RateLimiter(rate_limit),)
+        if isinstance(metrics, MetricsRegistry):
+            self.options["metrics"] = metrics
+        elif metrics:
+            self.options["metrics"] = default_registry
+        if isinstance(profiler, Profiler):
+            self.options["profiler"] = profiler
+        elif profiler:
+            self.options["profiler"] = default_profiler
 
     def get_prefix(self, prefix: str | None = None) -> str:
         if prefix is None:
@@ -31,27 +71,65 @@ class Router:
             self.children.append(child)
         elif callable(child):
             self.children.append(Handler(child))
+        self.revision += 1
         return self
 
-    def into_routes(self, prefix: str | None = None) -> Iterable[AbstractRouteDef]:
+    def get_revision(self) -> int:
+        revision = self.revision
+        for child in self.children:
+            if isinstance(child, Router):
+                revision += child.get_revision()
+        return revision
+
+    def into_routes(
+        self, prefix: str | None = None, router_options: RouterOptions | None = None
+    ) -> Iterable[AbstractRouteDef]:
         routes: list[AbstractRouteDef] = []
         prefix = self.get_prefix(prefix)
+        router_options = merge_router_options(router_options, self.options)
         for child in self.children:
             if isinstance(child, Router):
-                routes.extend(child.into_routes(prefix))
+                routes.extend(child.into_routes(prefix, router_options))
             else:
-                routes.append(child.into_route(prefix))
+                routes.append(child.into_route(prefix, router_options))
         return routes
 
+    def into_dispatcher(
+        self,
+        prefix: str | None = None,
+        router_options: RouterOptions | None = None,
+        dispatcher: Dispatcher | None = None,
+    ) -> Dispatcher:
+        if dispatcher is None:
+            dispatcher = Dispatcher()
+        prefix = self.get_prefix(prefix)
+        router_options = merge_router_options(router_options, self.options)
+        for child in self.children:
+            if isinstance(child, Router):
+                child.into_dispatcher(prefix, router_options, dispatcher)
+            else:
+                plan, handle = child.compile_route(prefix, router_options)
+                dispatcher.add(plan.method, plan.path_pattern, handle)
+        return dispatcher
+
+    def get_openapi_types(self, openapi: OpenAPI) -> dict[Type, str]:
+        if self.openapi_types is not None and self.openapi_types[0] is openapi:
+            return self.openapi_types[1]
+        types = SchemaTypes()
+        self.openapi_types = (openapi, types)
+        return types
+
     def into_openapi(
         self,
         openapi: OpenAPI,
         types: dict[Type, str] | None = None,
         prefix: str | None = None,
+        router_options: RouterOptions | None = None,
     ) -> OpenAPI:
         prefix = self.get_prefix(prefix)
         if types is None:
-            types = {}
+            types = self.get_openapi_types(openapi)
+        router_options = merge_router_options(router_options, self.options)
         for child in self.children:
-            openapi = child.into_openapi(openapi, types, prefix)
+            openapi = child.into_openapi(openapi, types, prefix, router_options)
         return openapi
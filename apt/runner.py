@@ -0,0 +1,501 @@
+import os
+import signal
+import socket
+import struct
+import time
+from argparse import ArgumentParser
+from asyncio import CancelledError, Event, create_task, get_running_loop, sleep
+from asyncio import run as run_async
+from collections import deque
+from importlib import import_module
+from inspect import isawaitable
+from logging import exception, info, warning
+from mmap import mmap
+from select import select
+from typing import Any, Awaitable, Callable, NamedTuple, NotRequired, TypedDict
+from aiohttp.web import (
+    AppRunner,
+    Application,
+    HTTPException,
+    Request,
+    SockSite,
+    StreamResponse,
+    json_response,
+    middleware,
+)
+
+from apt.router.router import Router
+
+type AppFactory = Callable[[], Application | Awaitable[Application]]
+type AppTarget = Router | Application | AppFactory
+
+worker_record = struct.Struct("<qddqqq")
+
+
+class RunnerOptions(TypedDict):
+    host: NotRequired[str]
+    port: NotRequired[int]
+    workers: NotRequired[int]
+    reuse_port: NotRequired[bool]
+    backlog: NotRequired[int]
+    shutdown_timeout: NotRequired[float]
+    heartbeat_interval: NotRequired[float]
+    heartbeat_timeout: NotRequired[float]
+    stats_path: NotRequired[str | None]
+
+
+class WorkerStats(NamedTuple):
+    slot: int
+    pid: int
+    started: float
+    heartbeat: float
+    requests: int
+    errors: int
+    active: int
+
+    def is_healthy(self, timeout: float, now: float | None = None) -> bool:
+        if self.pid == 0 or self.heartbeat == 0:
+            return False
+        return (now if now is not None else time.time()) - self.heartbeat <= timeout
+
+
+class StatsTable:
+    workers: int
+    buffer: mmap
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.buffer = mmap(-1, worker_record.size * workers)
+
+    def write(
+        self,
+        slot: int,
+        pid: int,
+        started: float,
+        heartbeat: float,
+        requests: int = 0,
+        errors: int = 0,
+        active: int = 0,
+    ):
+        worker_record.pack_into(
+            self.buffer,
+            slot * worker_record.size,
+            pid,
+            started,
+            heartbeat,
+            requests,
+            errors,
+            active,
+        )
+
+    def clear(self, slot: int):
+        self.write(slot, 0, 0.0, 0.0)
+
+    def read(self, slot: int) -> WorkerStats:
+        return WorkerStats(
+            slot, *worker_record.unpack_from(self.buffer, slot * worker_record.size)
+        )
+
+    def all(self) -> list[WorkerStats]:
+        return [
+            stats
+            for stats in (self.read(slot) for slot in range(self.workers))
+            if stats.pid != 0
+        ]
+
+
+def aggregate_stats(workers: list[WorkerStats], timeout: float) -> dict[str, Any]:
+    now = time.time()
+    return {
+        "workers": [
+            {**stats._asdict(), "healthy": stats.is_healthy(timeout, now)}
+            for stats in workers
+        ],
+        "healthy": sum(1 for stats in workers if stats.is_healthy(timeout, now)),
+        "requests": sum(stats.requests for stats in workers),
+        "errors": sum(stats.errors for stats in workers),
+        "active": sum(stats.active for stats in workers),
+    }
+
+
+async def create_app(target: AppTarget) -> Application:
+    if isinstance(target, Application):
+        return target
+    if isinstance(target, Router):
+        app = Application()
+        app.add_routes(target.into_routes())
+        return app
+    app = target()
+    if isawaitable(app):
+        app = await app
+    return await create_app(app)
+
+
+def load_target(path: str) -> AppTarget:
+    module_name, _, attr = path.partition(":")
+    target = import_module(module_name)
+    for name in (attr or "app").split("."):
+        target = getattr(target, name)
+    return target
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.setblocking(False)
+    return sock
+
+
+class Worker:
+    slot: int
+    table: StatsTable
+    sock: socket.socket
+    options: RunnerOptions
+    started: float
+    requests: int
+    errors: int
+    active: int
+
+    def __init__(
+        self,
+        slot: int,
+        table: StatsTable,
+        sock: socket.socket,
+        options: RunnerOptions,
+    ):
+        self.slot = slot
+        self.table = table
+        self.sock = sock
+        self.options = options
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+
+    def publish(self):
+        self.table.write(
+            self.slot,
+            os.getpid(),
+            self.started,
+            time.time(),
+            self.requests,
+            self.errors,
+            self.active,
+        )
+
+    @middleware
+    async def middleware(self, request: Request, handler: Any) -> StreamResponse:
+        self.requests += 1
+        self.active += 1
+        try:
+            response = await handler(request)
+        except HTTPException as e:
+            if e.status >= 500:
+                self.errors += 1
+            raise
+        except BaseException:
+            self.errors += 1
+            raise
+        finally:
+            self.active -= 1
+        if response.status >= 500:
+            self.errors += 1
+        return response
+
+    async def stats(self, request: Request) -> StreamResponse:
+        self.publish()
+        return json_response(
+            aggregate_stats(
+                self.table.all(), self.options.get("heartbeat_timeout", 10.0)
+            )
+        )
+
+    async def heartbeat(self):
+        interval = self.options.get("heartbeat_interval", 1.0)
+        while True:
+            self.publish()
+            await sleep(interval)
+
+    async def serve(self, target: AppTarget):
+        app = await create_app(target)
+        app.middlewares.append(self.middleware)
+        stats_path = self.options.get("stats_path")
+        if stats_path is not None:
+            app.router.add_get(stats_path, self.stats)
+
+        runner = AppRunner(
+            app, shutdown_timeout=self.options.get("shutdown_timeout", 30.0)
+        )
+        await runner.setup()
+        site = SockSite(runner, self.sock, backlog=self.options.get("backlog", 128))
+        await site.start()
+
+        stop = Event()
+        get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        heartbeat = create_task(self.heartbeat())
+        try:
+            await stop.wait()
+        finally:
+            await runner.cleanup()
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except CancelledError:
+                pass
+
+
+class Runner:
+    target: AppTarget
+    options: RunnerOptions
+    host: str
+    port: int
+    workers: int
+    reuse_port: bool
+    table: StatsTable
+    sock: socket.socket | None
+    pids: dict[int, int]
+    stopping: bool
+    deadline: float
+    restarting: deque[int]
+    replacing: tuple[int, int] | None
+    respawns: dict[int, float]
+    wakeup: tuple[int, int] | None
+
+    def __init__(self, target: AppTarget, options: RunnerOptions | None = None):
+        if options is None:
+            options = {}
+        self.target = target
+        self.options = options
+        self.host = options.get("host", "0.0.0.0")
+        self.port = options.get("port", 8080)
+        self.workers = options.get("workers", os.cpu_count() or 1)
+        self.reuse_port = options.get("reuse_port", hasattr(socket, "SO_REUSEPORT"))
+        self.table = StatsTable(self.workers)
+        self.sock = None
+        self.pids = {}
+        self.stopping = False
+        self.deadline = 0.0
+        self.restarting = deque()
+        self.replacing = None
+        self.respawns = {}
+        self.wakeup = None
+
+    def stats(self) -> dict[str, Any]:
+        return aggregate_stats(
+            self.table.all(), self.options.get("heartbeat_timeout", 10.0)
+        )
+
+    def listen(self) -> socket.socket:
+        sock = bind_socket(self.host, self.port, self.reuse_port)
+        if not self.reuse_port:
+            sock.listen(self.options.get("backlog", 128))
+        self.port = sock.getsockname()[1]
+        return sock
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            self.run_worker(slot)
+        self.pids[pid] = slot
+        self.table.write(slot, pid, time.time(), 0.0)
+
+    def run_worker(self, slot: int):
+        code = 0
+        try:
+            signal.set_wakeup_fd(-1)
+            if self.wakeup is not None:
+                os.close(self.wakeup[0])
+                os.close(self.wakeup[1])
+            for signum in (signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            sock = self.sock
+            if self.reuse_port or sock is None:
+                if sock is not None:
+                    sock.close()
+                sock = bind_socket(self.host, self.port, self.reuse_port)
+                sock.listen(self.options.get("backlog", 128))
+            run_async(Worker(slot, self.table, sock, self.options).serve(self.target))
+        except BaseException:
+            exception("worker %d failed", slot)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(self, signum: int = signal.SIGTERM, frame: Any = None):
+        if self.stopping:
+            return
+        self.stopping = True
+        self.deadline = (
+            time.monotonic() + self.options.get("shutdown_timeout", 30.0) + 5.0
+        )
+        self.signal_workers(signal.SIGTERM)
+
+    def restart(self, signum: int = signal.SIGHUP, frame: Any = None):
+        if not self.stopping:
+            self.restarting.extend(
+                slot for slot in range(self.workers) if slot not in self.restarting
+            )
+
+    def signal_workers(self, signum: int):
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.pids.clear()
+                return
+            if pid == 0:
+                return
+            slot = self.pids.pop(pid, None)
+            if slot is None:
+                continue
+            stats = self.table.read(slot)
+            if stats.pid == pid:
+                self.table.clear(slot)
+            if self.stopping:
+                continue
+            if self.replacing is not None and self.replacing[1] == pid:
+                self.spawn(slot)
+                continue
+            warning(
+                "worker %d (pid %d) exited with status %d",
+                slot,
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            if stats.pid == pid and time.time() - stats.started < 1.0:
+                self.respawns[slot] = time.monotonic() + 1.0
+            else:
+                self.spawn(slot)
+
+    def respawn(self):
+        now = time.monotonic()
+        for slot, at in list(self.respawns.items()):
+            if at <= now:
+                del self.respawns[slot]
+                self.spawn(slot)
+
+    def slot_pid(self, slot: int) -> int | None:
+        for pid, worker_slot in self.pids.items():
+            if worker_slot == slot:
+                return pid
+        return None
+
+    def check_heartbeats(self):
+        now = time.time()
+        timeout = self.options.get("heartbeat_timeout", 10.0)
+        for pid, slot in list(self.pids.items()):
+            stats = self.table.read(slot)
+            if stats.pid == pid and now - max(stats.started, stats.heartbeat) > timeout:
+                warning("worker %d (pid %d) missed its heartbeat", slot, pid)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def step_restart(self):
+        if self.replacing is not None:
+            slot, retired = self.replacing
+            pid = self.slot_pid(slot)
+            stats = self.table.read(slot)
+            if pid in (None, retired) or stats.pid != pid or stats.heartbeat == 0:
+                return
+            self.replacing = None
+        if not self.restarting:
+            return
+        slot = self.restarting.popleft()
+        pid = self.slot_pid(slot)
+        if pid is None:
+            return
+        self.replacing = (slot, pid)
+        os.kill(pid, signal.SIGTERM)
+
+    def run(self):
+        self.sock = self.listen()
+        self.wakeup = os.pipe()
+        os.set_blocking(self.wakeup[0], False)
+        os.set_blocking(self.wakeup[1], False)
+        signal.set_wakeup_fd(self.wakeup[1])
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.restart)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        info("serving on %s:%d with %d workers", self.host, self.port, self.workers)
+
+        interval = self.options.get("heartbeat_interval", 1.0)
+        try:
+            for slot in range(self.workers):
+                self.spawn(slot)
+            while True:
+                ready, _, _ = select([self.wakeup[0]], [], [], interval)
+                if ready:
+                    try:
+                        while os.read(self.wakeup[0], 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                self.reap()
+                if self.stopping:
+                    if not self.pids:
+                        break
+                    if time.monotonic() > self.deadline:
+                        self.signal_workers(signal.SIGKILL)
+                    continue
+                self.respawn()
+                self.check_heartbeats()
+                self.step_restart()
+        finally:
+            if not self.stopping:
+                self.stop()
+            while self.pids:
+                try:
+                    pid, _ = os.waitpid(-1, 0)
+                except ChildProcessError:
+                    break
+                self.pids.pop(pid, None)
+            signal.set_wakeup_fd(-1)
+            os.close(self.wakeup[0])
+            os.close(self.wakeup[1])
+            self.wakeup = None
+            self.sock.close()
+            self.sock = None
+
+
+def run(target: AppTarget, **options: Any):
+    Runner(target, RunnerOptions(**options)).run()
+
+
+def main():
+    parser = ArgumentParser(prog="python -m apt.runner")
+    parser.add_argument("target", help="module:attribute of a Router, app or factory")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-reuse-port", action="store_true")
+    parser.add_argument("--shutdown-timeout", type=float, default=30.0)
+    parser.add_argument("--stats-path", default=None)
+    args = parser.parse_args()
+    run(
+        load_target(args.target),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reuse_port=not args.no_reuse_port and hasattr(socket, "SO_REUSEPORT"),
+        shutdown_timeout=args.shutdown_timeout,
+        stats_path=args.stats_path,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from asyncio import get_running_loop
+from hashlib import new as new_hash
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any
+
+default_spool_size = 1024 * 1024
+
+
+class UploadFile:
+    name: str
+    filename: str | None
+    content_type: str | None
+    size: int
+    spool_size: int
+    checksum: str | None
+    file: IO[bytes]
+
+    def __init__(
+        self,
+        name: str,
+        filename: str | None = None,
+        content_type: str | None = None,
+        checksum_algorithm: str | None = None,
+        spool_size: int = default_spool_size,
+    ):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.spool_size = spool_size
+        self.checksum = None
+        self.file = SpooledTemporaryFile(max_size=spool_size)
+        self.hash: Any = (
+            new_hash(checksum_algorithm) if checksum_algorithm is not None else None
+        )
+
+    def write(self, chunk: bytes):
+        self.file.write(chunk)
+        self.size += len(chunk)
+        if self.hash is not None:
+            self.hash.update(chunk)
+
+    async def write_async(self, chunk: bytes):
+        if self.size + len(chunk) <= self.spool_size:
+            self.write(chunk)
+        else:
+            await get_running_loop().run_in_executor(None, self.write, chunk)
+
+    def finish(self):
+        if self.hash is not None:
+            self.checksum = self.hash.hexdigest()
+            self.hash = None
+        self.file.seek(0)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "UploadFile":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
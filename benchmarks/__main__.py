@@ -0,0 +1,66 @@
+import asyncio
+import json
+import sys
+from argparse import ArgumentParser
+from fnmatch import fnmatch
+
+from benchmarks import extract, openapi, dispatch
+from benchmarks.suite import (
+    benchmarks as registry,
+    compare,
+    dump_results,
+    load_results,
+    run_benchmark,
+)
+
+modules = (extract, openapi, dispatch)
+
+
+async def run(patterns: list[str], repeat: int, scale: float):
+    results = []
+    for bench in registry:
+        if patterns and not any(fnmatch(bench.name, pattern) for pattern in patterns):
+            continue
+        result = await run_benchmark(bench, repeat, scale)
+        print(
+            f"{result.name:<48} {result.seconds * 1e6:>12.2f} us",
+            file=sys.stderr,
+        )
+        results.append(result)
+    return results
+
+
+def main():
+    parser = ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("patterns", nargs="*", help="glob patterns of benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against stored results")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.patterns, args.repeat, args.scale))
+    if args.json == "-":
+        json.dump(
+            {"results": {result.name: result.into_json() for result in results}},
+            sys.stdout,
+            indent=2,
+        )
+    elif args.json:
+        dump_results(results, args.json)
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression.name}: {regression.seconds * 1e6:.2f} us vs "
+                f"{regression.baseline * 1e6:.2f} us ({regression.ratio:.2f}x)",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
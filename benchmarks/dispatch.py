@@ -0,0 +1,124 @@
+from aiohttp.test_utils import TestClient, TestServer, make_mocked_request
+from aiohttp.web import Application, Request, Response
+from pydantic import BaseModel
+
+from apt.extract import JSON, Path, Query
+from apt.router import Router, endpoint
+from apt.router.dispatch import Dispatcher
+from benchmarks.suite import benchmark
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    price: float
+
+
+class Page(BaseModel):
+    limit: int = 10
+    offset: int = 0
+
+
+@endpoint(path="/items/{id}", method="GET")
+async def get_item(id: Path[int]) -> Item:
+    return Item(id=id.value, name="Item", price=9.99)
+
+
+@endpoint(path="/items", method="GET")
+async def list_items(page: Query[Page]) -> list[Item]:
+    return [
+        Item(id=i, name=f"Item {i}", price=i * 1.5)
+        for i in range(page.value.offset, page.value.offset + page.value.limit)
+    ]
+
+
+@endpoint(path="/items", method="POST")
+async def create_item(item: JSON[Item]) -> Item:
+    return item.value
+
+
+def create_app() -> Application:
+    router = Router("/api").add(get_item).add(list_items).add(create_item)
+    app = Application()
+    app.add_routes(router.into_routes())
+    return app
+
+
+async def serve():
+    async with TestClient(TestServer(create_app())) as client:
+        yield client
+
+
+@benchmark("dispatch.get_path", 1000)
+async def bench_get_path():
+    async for client in serve():
+
+        async def op():
+            async with client.get("/api/items/42") as response:
+                await response.read()
+
+        yield op
+
+
+@benchmark("dispatch.get_query_list", 1000)
+async def bench_get_query_list():
+    async for client in serve():
+
+        async def op():
+            async with client.get("/api/items?limit=50&offset=10") as response:
+                await response.read()
+
+        yield op
+
+
+@benchmark("dispatch.post_json", 1000)
+async def bench_post_json():
+    async for client in serve():
+        body = Item(id=1, name="Item", price=9.99).model_dump_json()
+
+        async def op():
+            async with client.post(
+                "/api/items",
+                data=body,
+                headers={"Content-Type": "application/json"},
+            ) as response:
+                await response.read()
+
+        yield op
+
+
+async def empty(request: Request) -> Response:
+    return Response()
+
+
+def routing_table(count: int) -> list[str]:
+    return [f"/api/resource{i}/{{id}}/items/{{item}}" for i in range(count)]
+
+
+def register_routing(count: int):
+    path = f"/api/resource{count - 1}/42/items/7"
+
+    @benchmark(f"routing.radix_{count}", 20000)
+    async def bench_radix():
+        dispatcher = Dispatcher()
+        for path_pattern in routing_table(count):
+            dispatcher.add("GET", path_pattern, empty)
+        yield lambda: dispatcher.resolve(path)
+
+    @benchmark(f"routing.aiohttp_{count}", 20000)
+    async def bench_aiohttp():
+        app = Application()
+        for path_pattern in routing_table(count):
+            app.router.add_get(path_pattern, empty)
+        app.freeze()
+        request = make_mocked_request("GET", path, app=app)
+        resolve = app.router.resolve
+
+        async def op():
+            await resolve(request)
+
+        yield op
+
+
+for count in (10, 1000, 10000):
+    register_routing(count)
@@ -0,0 +1,224 @@
+from asyncio import get_running_loop
+from typing import NamedTuple, Optional
+from unittest.mock import Mock
+from aiohttp.streams import StreamReader
+from aiohttp.test_utils import make_mocked_request
+from aiohttp.web import Request
+from multidict import MultiDict, MultiDictProxy
+from pydantic import BaseModel
+
+from apt import dict_from_form_data, get_type_adapter, str_to_python_value
+from apt.extract.codec import MessagePackCodec
+from apt.extract import JSON, Header, JSONList, Multipart, Path, Query, UploadFile
+from benchmarks.suite import benchmark
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+    zip: str
+
+
+class Order(BaseModel):
+    id: int
+    customer: str
+    email: str
+    total: float
+    paid: bool
+    tags: list[str]
+    address: Address
+
+
+class Orders(BaseModel):
+    orders: list[Order]
+
+
+class Search(BaseModel):
+    q: str
+    limit: Optional[int] = None
+    offset: Optional[int] = None
+    sort: Optional[str] = None
+    ids: list[int] = []
+
+
+class RequestHeaders(BaseModel):
+    authorization: str
+    x_tenant_id: int
+    if_none_match: Optional[str] = None
+
+
+class OrderPath(NamedTuple):
+    account: str
+    order: int
+
+
+class Upload:
+    name: str
+    description: str
+    file: UploadFile
+
+
+orders_body = (
+    Orders(
+        orders=[
+            Order(
+                id=i,
+                customer=f"Customer {i}",
+                email=f"customer{i}@example.com",
+                total=i * 10.5,
+                paid=i % 2 == 0,
+                tags=["priority", "gift", f"batch-{i % 7}"],
+                address=Address(
+                    street=f"{i} Main Street", city="Springfield", zip="12345"
+                ),
+            )
+            for i in range(100)
+        ]
+    )
+    .model_dump_json()
+    .encode()
+)
+
+
+class Reading(BaseModel):
+    sensor: str
+    value: float
+
+
+readings_body = get_type_adapter(list[Reading]).dump_json(
+    [Reading(sensor=f"sensor-{i % 50}", value=i / 10) for i in range(20000)]
+)
+
+boundary = "benchmarkboundary"
+upload_body = (
+    (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="name"\r\n\r\n'
+        "report.csv\r\n"
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="description"\r\n\r\n'
+        "Quarterly report\r\n"
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="report.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode()
+    + (b"id,name,total\r\n" * 16384)
+    + f"\r\n--{boundary}--\r\n".encode()
+)
+
+
+def body_request(path: str, body: bytes, content_type: str) -> Request:
+    payload = StreamReader(Mock(_reading_paused=False), 2**16, loop=get_running_loop())
+    payload.feed_data(body)
+    payload.feed_eof()
+    return make_mocked_request(
+        "POST",
+        path,
+        headers={"Content-Type": content_type, "Content-Length": str(len(body))},
+        payload=payload,
+    )
+
+
+@benchmark("str_to_python_value", 200000)
+async def bench_str_to_python_value():
+    values = ["42", "3.14", "true", "off", "hello"]
+
+    def op():
+        for value in values:
+            str_to_python_value(value)
+
+    yield op
+
+
+@benchmark("dict_from_form_data", 100000)
+async def bench_dict_from_form_data():
+    yield lambda: dict_from_form_data(
+        'form-data; name="file"; filename="report.csv"; size="16384"'
+    )
+
+
+@benchmark("path.tuple_from_path", 50000)
+async def bench_tuple_from_path():
+    yield lambda: Path.tuple_from_path(
+        "/accounts/acme/orders/1234",
+        "/accounts/{account}/orders/{order}",
+        OrderPath,
+    )
+
+
+@benchmark("query.struct_from_query_string", 50000)
+async def bench_struct_from_query_string():
+    query = MultiDictProxy(
+        MultiDict(
+            [
+                ("q", "red shoes"),
+                ("limit", "50"),
+                ("offset", "100"),
+                ("sort", "price"),
+                ("ids", "1"),
+                ("ids", "2"),
+                ("ids", "3"),
+            ]
+        )
+    )
+    yield lambda: Query.struct_from_query_string(query, Search)
+
+
+@benchmark("header.extract", 50000)
+async def bench_header_extract():
+    headers = {
+        "Authorization": "Bearer token",
+        "X-Tenant-Id": "42",
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, br",
+        "User-Agent": "benchmark",
+    }
+    headers.update({f"X-Extra-{i}": str(i) for i in range(20)})
+    request = make_mocked_request("GET", "/orders", headers=headers)
+    extractor = Header.compile(Header[RequestHeaders], name="", path_pattern="/orders")
+
+    async def op():
+        await extractor(request)
+
+    yield op
+
+
+@benchmark("json.extract_100_orders", 2000)
+async def bench_json_extract():
+    async def op():
+        request = body_request("/orders", orders_body, "application/json")
+        await JSON.extract(JSON[Orders], request=request, path_pattern="/orders")
+
+    yield op
+
+
+@benchmark("json_list.extract_20k_items", 50)
+async def bench_json_list_extract():
+    extractor = JSONList.compile(JSONList[Reading], name="", path_pattern="/readings")
+
+    async def op():
+        request = body_request("/readings", readings_body, "application/json")
+        await extractor(request)
+
+    yield op
+
+
+@benchmark("codec.msgpack_round_trip_100_orders", 200)
+async def bench_msgpack_round_trip():
+    codec = MessagePackCodec()
+    orders = Orders.model_validate_json(orders_body).model_dump(mode="json")
+    yield lambda: codec.decode(codec.encode(orders))
+
+
+@benchmark("multipart.extract_256k", 500)
+async def bench_multipart_extract():
+    async def op():
+        request = body_request(
+            "/upload", upload_body, f"multipart/form-data; boundary={boundary}"
+        )
+        result = await Multipart.extract(
+            Multipart[Upload], request=request, path_pattern="/upload"
+        )
+        result.ok().get().file.close()
+
+    yield op
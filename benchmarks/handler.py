@@ -0,0 +1,125 @@
+import asyncio
+from time import perf_counter
+from typing import Any, Unpack, get_type_hints
+from aiohttp.test_utils import make_mocked_request
+from aiohttp.web import Request, Response
+from result import Ok, Result, is_err
+
+from apt.extract.extract import Extract, ExtractIntoOpenAPIKWArgs, ExtractKWArgs
+from apt.router import Handler, endpoint
+
+
+class Value(Extract[Response]):
+    is_cheap = True
+
+    @staticmethod
+    async def extract(cls, **kwargs: Unpack[ExtractKWArgs]) -> Result[int, Response]:
+        return Ok(1)
+
+    @staticmethod
+    def into_openapi(cls, **kwargs: Unpack[ExtractIntoOpenAPIKWArgs]): ...
+
+
+class LegacyHandler(Handler):
+    async def arguments(
+        self, request: Request, prefix: str | None = None
+    ) -> Result[dict[str, Any], Response]:
+        args: dict[str, Any] = {}
+        path_pattern = self.get_path(prefix)
+        for key, cls in get_type_hints(self.handler).items():
+            if Extract.is_extractor(cls):
+                value = await cls.extract(
+                    cls, request=request, path_pattern=path_pattern
+                )
+                if is_err(value):
+                    return value
+                args[key] = value.ok()
+            elif key == "return":
+                continue
+            elif key == "request":
+                args[key] = request
+        return Ok(args)
+
+    async def handle(self, request: Request, prefix: str | None = None) -> Response:
+        result = await self.arguments(request, prefix)
+        if is_err(result):
+            return result.err()
+        return await self.handler(**result.ok())
+
+    def into_handle(self, prefix: str | None = None):
+        async def handle(request: Request) -> Response:
+            return await self.handle(request, prefix)
+
+        return handle
+
+
+async def handler0() -> Response:
+    return Response()
+
+
+async def handler1(a: Value) -> Response:
+    return Response()
+
+
+async def handler2(a: Value, b: Value) -> Response:
+    return Response()
+
+
+async def handler3(a: Value, b: Value, c: Value) -> Response:
+    return Response()
+
+
+async def handler4(a: Value, b: Value, c: Value, d: Value) -> Response:
+    return Response()
+
+
+async def handler5(a: Value, b: Value, c: Value, d: Value, e: Value) -> Response:
+    return Response()
+
+
+async def handler6(
+    a: Value, b: Value, c: Value, d: Value, e: Value, f: Value
+) -> Response:
+    return Response()
+
+
+handlers = [
+    endpoint(path="/bench", method="GET")(handler)
+    for handler in [
+        handler0,
+        handler1,
+        handler2,
+        handler3,
+        handler4,
+        handler5,
+        handler6,
+    ]
+]
+
+
+async def measure(handle, request: Request, iterations: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(iterations):
+            await handle(request)
+        best = min(best, (perf_counter() - start) / iterations)
+    return best
+
+
+async def run(iterations: int = 20000):
+    request = make_mocked_request("GET", "/bench")
+    print(f"{'extractors':>10} {'before (us)':>12} {'after (us)':>12} {'speedup':>8}")
+    for extractors, handler in enumerate(handlers):
+        before = await measure(
+            LegacyHandler(handler).into_handle(), request, iterations
+        )
+        after = await measure(Handler(handler).into_handle(), request, iterations)
+        print(
+            f"{extractors:>10} {before * 1e6:>12.2f} {after * 1e6:>12.2f}"
+            f" {before / after:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+from pydantic import BaseModel, create_model
+
+from apt.openapi import SchemaTypes, get_or_create_schema, openapi
+from apt.router import Router, endpoint
+from apt.extract import JSON, Path
+from benchmarks.suite import benchmark
+
+
+class Base(BaseModel):
+    id: int
+    name: str
+
+
+def create_models(count: int) -> list[type[BaseModel]]:
+    models: list[type[BaseModel]] = []
+    for i in range(count):
+        fields: dict = {
+            "id": (int, ...),
+            "name": (str, ...),
+            "score": (float, 0.0),
+            "tags": (list[str], []),
+            "base": (Base, ...),
+        }
+        if models:
+            fields["parent"] = (models[-1] | None, None)
+        models.append(create_model(f"Model{i}", **fields))
+    return models
+
+
+def create_router(models: list[type[BaseModel]]) -> Router:
+    router = Router("/api")
+    for i, model in enumerate(models):
+
+        async def handler(id: Path[int], body: JSON[model]) -> model:  # type: ignore
+            return body.value
+
+        router.add(endpoint(path=f"/models{i}/{{id}}", method="POST")(handler))
+    return router
+
+
+@benchmark("openapi.get_or_create_schema_2000_models", 3)
+async def bench_get_or_create_schema():
+    models = create_models(2000)
+
+    def op():
+        spec = openapi()
+        types: dict = {}
+        for model in models:
+            get_or_create_schema(model, spec, types)
+
+    yield op
+
+
+def register_scaling(count: int):
+    @benchmark(f"openapi.schema_deep_chain_{count}_models", 3)
+    async def bench_deep_chain():
+        models = create_models(count)
+        yield lambda: get_or_create_schema(models[-1], openapi(), SchemaTypes())
+
+    @benchmark(f"openapi.schema_same_name_{count}_models", 3)
+    async def bench_same_name():
+        models = [create_model("Item", id=(int, ...)) for _ in range(count)]
+
+        def op():
+            spec = openapi()
+            types = SchemaTypes()
+            for model in models:
+                get_or_create_schema(model, spec, types)
+
+        yield op
+
+
+for count in (1000, 5000):
+    register_scaling(count)
+
+
+@benchmark("openapi.router_into_openapi_1000_routes", 3)
+async def bench_router_into_openapi():
+    router = create_router(create_models(1000))
+    yield lambda: router.into_openapi(openapi())
+
+
+@benchmark("openapi.router_into_openapi_incremental_1000_routes", 100)
+async def bench_router_into_openapi_incremental():
+    models = create_models(1001)
+    router = create_router(models[:1000])
+    spec = openapi()
+    router.into_openapi(spec)
+    model = models[1000]
+
+    async def handler(id: Path[int], body: JSON[model]) -> model:  # type: ignore
+        return body.value
+
+    def op():
+        router.add(endpoint(path="/late/{id}", method="POST")(handler))
+        router.into_openapi(spec)
+        router.children.pop()
+
+    yield op
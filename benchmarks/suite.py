@@ -0,0 +1,96 @@
+import json
+from contextlib import asynccontextmanager
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, NamedTuple
+
+type Setup = Callable[[], AsyncIterator[Callable[[], Any]]]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    iterations: int
+    setup: Setup
+
+
+class Result(NamedTuple):
+    name: str
+    iterations: int
+    seconds: float
+
+    def into_json(self) -> dict[str, Any]:
+        return {
+            "iterations": self.iterations,
+            "seconds": self.seconds,
+            "ops": 1 / self.seconds if self.seconds else 0.0,
+        }
+
+
+class Regression(NamedTuple):
+    name: str
+    baseline: float
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.seconds / self.baseline
+
+
+benchmarks: list[Benchmark] = []
+
+
+def benchmark(name: str, iterations: int) -> Callable[[Setup], Setup]:
+    def wrapper(setup: Setup) -> Setup:
+        benchmarks.append(Benchmark(name, iterations, setup))
+        return setup
+
+    return wrapper
+
+
+async def run_benchmark(bench: Benchmark, repeat: int, scale: float) -> Result:
+    iterations = max(1, int(bench.iterations * scale))
+    async with asynccontextmanager(bench.setup)() as op:
+        is_async = iscoroutinefunction(op)
+        if is_async:
+            await op()
+        else:
+            op()
+        best = float("inf")
+        for _ in range(repeat):
+            start = perf_counter()
+            if is_async:
+                for _ in range(iterations):
+                    await op()
+            else:
+                for _ in range(iterations):
+                    op()
+            best = min(best, (perf_counter() - start) / iterations)
+    return Result(bench.name, iterations, best)
+
+
+def load_results(path: str) -> dict[str, float]:
+    with open(path) as file:
+        data = json.load(file)
+    return {name: result["seconds"] for name, result in data["results"].items()}
+
+
+def dump_results(results: list[Result], path: str):
+    with open(path, "w") as file:
+        json.dump(
+            {"results": {result.name: result.into_json() for result in results}},
+            file,
+            indent=2,
+            sort_keys=True,
+        )
+        file.write("\n")
+
+
+def compare(
+    results: list[Result], baseline: dict[str, float], tolerance: float
+) -> list[Regression]:
+    return [
+        Regression(result.name, baseline[result.name], result.seconds)
+        for result in results
+        if result.name in baseline
+        and result.seconds > baseline[result.name] * (1 + tolerance)
+    ]
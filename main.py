@@ -1,15 +1,16 @@
-import json
-from typing import Optional
+from typing import AsyncIterator, Optional
 from aiohttp import BodyPartReader
-from aiohttp.web import run_app, Response, Application
+from aiohttp.web import Response, Application
 import aiohttp_cors
 from pydantic import BaseModel
 
 from apt.extract import JSON, Query, Path
 from apt.extract.multipart import Multipart
 from apt.openapi import openapi, OpenAPIInfo
-from apt.openapi.spec import OpenAPI, OpenAPIBinaryFormat
+from apt.openapi.document import openapi_endpoint
+from apt.openapi.spec import OpenAPIBinaryFormat
 from apt.router import endpoint, Router
+from apt.runner import run
 
 
 test_openapi = openapi(
@@ -52,7 +53,7 @@ async def test_endpoint(
     new_user_json: JSON[NewUserRequest],
     limit_and_offset_query: Query[LimitAndOffsetQuery],
     path: Path[tuple[str, int]],
-) -> Response:
+) -> User:
     new_user = new_user_json.get()
     print(new_user)
 
@@ -62,9 +63,21 @@ async def test_endpoint(
     (action, path_id) = path.get()
     print(action, path_id)
 
-    user = User(id=1, name=new_user.name)
+    return User(id=1, name=new_user.name)
 
-    return Response(body=user.model_dump_json(), content_type="application/json")
+
+@endpoint(
+    path="/users/export",
+    method="GET",
+)
+async def export_users_endpoint(
+    limit_and_offset_query: Query[LimitAndOffsetQuery],
+) -> AsyncIterator[User]:
+    limit_and_offset = limit_and_offset_query.get()
+    offset = limit_and_offset.offset or 0
+    limit = limit_and_offset.limit or 100
+    for user_id in range(offset, offset + limit):
+        yield User(id=user_id, name=f"User {user_id}")
 
 
 class MultipartUpload:
@@ -84,21 +97,13 @@ async def multipart_endpoint(multipart: Multipart[MultipartUpload]) -> Response:
     return Response(status=204)
 
 
-@endpoint(
-    path="/openapi.json",
-    method="GET",
-    responses={200: ("application/json", OpenAPI)},
-)
-async def openapi_json() -> Response:
-    return Response(body=json.dumps(test_openapi), content_type="application/json")
-
-
-def main():
+def create_app() -> Application:
     api_router = Router("/api")
-    api_router.add(openapi_json)
+    api_router.add(openapi_endpoint(test_openapi, api_router))
 
     util_router = Router("/util")
     util_router.add(test_endpoint)
+    util_router.add(export_users_endpoint)
 
     util_router.add(multipart_endpoint)
 
@@ -118,7 +123,11 @@ def main():
     )
     for route in list(app.router.routes()):
         cors.add(route)
-    run_app(app)
+    return app
+
+
+def main():
+    run(create_app, port=8080)
 
 
 if __name__ == "__main__":